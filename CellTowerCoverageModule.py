@@ -1,81 +1,397 @@
 from __future__ import annotations
 
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
 import gurobipy as gp
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
 from gurobipy import GRB
 
+import solveControl
+import solverProfiles
+import solverTelemetry
+from solutionPool import OPTIMUM, PoolOptions, SolutionPool
 
-def cell_tower_problem(
-        region_population: dict[int, int],
-        site_coverage_cost: dict[int, list[set[int] | float]],
-        budget: float
-):
-    try:
+# pool of cell_tower_problem when none is given
+CELL_TOWER_POOL = PoolOptions(4, 2, 0.001)
+
+
+def coverage_index(regions, sites, coverage) -> sp.csr_matrix:
+    """
+    Invert the site -> regions coverage into a (regions x sites) CSR matrix:
+    row ``i`` lists the positions of the sites covering ``regions[i]``. Built
+    in one pass over the coverage entries, regions unknown to ``regions`` are
+    ignored.
+    """
+    position = {region: i for i, region in enumerate(regions)}
+    rows = []
+    columns = []
+    for j, site in enumerate(sites):
+        for region in coverage[site]:
+            i = position.get(region)
+            if i is not None:
+                rows.append(i)
+                columns.append(j)
+    data = np.ones(len(rows))
+    matrix = sp.csr_matrix((data, (rows, columns)), shape=(len(regions), len(sites)))
+    # a site listing a region twice still covers it once
+    matrix.data[:] = 1.0
+    return matrix
+
+
+class CoverageData:
+    """
+    Parameters of a cell tower instance as arrays: the (regions x sites)
+    coverage matrix, the site costs and the region populations. A precomputed
+    ``covering`` matrix (see coverageGeometry), rows and columns in the order
+    of ``region_population`` and ``site_coverage_cost``, replaces the coverage
+    sets.
+    """
+
+    def __init__(self, region_population, site_coverage_cost, covering=None):
         # Parameters
-        regions, population = gp.multidict(region_population)
+        self.regions, self.population = gp.multidict(region_population)
+
+        self.sites, self.coverage, self.cost = gp.multidict(site_coverage_cost)
+
+        if covering is None:
+            covering = coverage_index(self.regions, self.sites, self.coverage)
+        self.covering = sp.csr_matrix(covering)
+        self.cost_array = np.array([self.cost[site] for site in self.sites], dtype=float)
+        self.population_array = np.array([self.population[region] for region in self.regions], dtype=float)
+        self.total_population = sum(self.population[region] for region in self.regions)
+        # removed sites keep their position but can no longer be built
+        self.available = np.ones(len(self.sites), dtype=bool)
+
+    def metrics(self, built, budget: float) -> dict:
+        """
+        Towers, cost, budget consumption and coverage of the 0/1 build vector
+        ``built``, which is indexed by site position. ``towers_built`` lists
+        the keys of the sites built.
+        """
+        total_cost = float(self.cost_array @ built)
+        covered = (self.covering @ built) > 0
+        return {
+            "towers_built": [self.sites[j] for j in np.flatnonzero(built).tolist()],
+            "total_cost": total_cost,
+            "budget_consumption": round(100 * total_cost / budget, 2),
+            "total_population": self.total_population,
+            "coverage_percentage": round(float(100 * self.population_array @ covered / self.total_population), 2),
+        }
+
+    def greedy(self, budget: float):
+        """
+        Lazy-greedy budgeted maximum coverage: sites are taken by decreasing
+        covered population per unit of cost, the gains in the priority queue
+        are upper bounds (coverage is submodular) and only recomputed when a
+        site reaches the top. The better of the greedy set and the best single
+        site covers at least 1/2 (1 - 1/e) of the optimum.
+
+        Returns the 0/1 build vector and a report with the covered population,
+        the a-priori guarantee and an a-posteriori upper bound on the
+        optimum, or None when no site fits in the budget.
+        """
+        by_site = self.covering.tocsc()
+        indptr, indices = by_site.indptr, by_site.indices
+        cost = self.cost_array
+        population = self.population_array
+        full_gain = by_site.T @ population
+        affordable = np.flatnonzero((cost <= budget) & self.available)
+        if len(affordable) == 0:
+            return None
+
+        def ratio(gain, j):
+            return gain / cost[j] if cost[j] > 0 else np.inf
+
+        uncovered = np.ones(len(self.regions), dtype=bool)
+        built = np.zeros(len(self.sites))
+        spent = 0.0
+        queue = [(-ratio(full_gain[j], j), j) for j in affordable if full_gain[j] > 0]
+        heapq.heapify(queue)
+        while queue:
+            _, j = heapq.heappop(queue)
+            if spent + cost[j] > budget:
+                # the remaining budget only decreases
+                continue
+            regions = indices[indptr[j]:indptr[j + 1]]
+            regions = regions[uncovered[regions]]
+            gain = population[regions].sum()
+            if gain <= 0:
+                continue
+            key = -ratio(gain, j)
+            if queue and key > queue[0][0]:
+                heapq.heappush(queue, (key, j))
+                continue
+            built[j] = 1
+            spent += cost[j]
+            uncovered[regions] = False
+
+        best = affordable[np.argmax(full_gain[affordable])]
+        if full_gain[best] > population @ ~uncovered:
+            built = np.zeros(len(self.sites))
+            built[best] = 1
+            uncovered = (self.covering @ built) == 0
+        if not built.any():
+            # at least one tower is built
+            built[affordable[np.argmin(cost[affordable])]] = 1
+            uncovered = (self.covering @ built) == 0
+
+        value = float(population @ ~uncovered)
+        return built, {
+            "covered_population": value,
+            "guarantee": 0.5 * (1 - 1 / np.e),
+            "upper_bound": self._upper_bound(value, uncovered, budget),
+        }
+
+    def _upper_bound(self, value, uncovered, budget):
+        # by submodularity the optimum is at most the current value plus the
+        # best gains fitting in the budget, bounded by the fractional knapsack
+        # of the marginal gains of every site
+        gains = self.covering.T @ (self.population_array * uncovered)
+        cost = self.cost_array
+        free = cost <= 0
+        bound = value + gains[free].sum()
+        order = np.flatnonzero(~free & (gains > 0))
+        order = order[np.argsort(-gains[order] / cost[order])]
+        taken = np.cumsum(cost[order])
+        whole = taken <= budget
+        bound += gains[order[whole]].sum()
+        if not whole.all():
+            k = np.argmin(whole)
+            remaining = budget - (taken[k - 1] if k > 0 else 0.0)
+            bound += gains[order[k]] * remaining / cost[order[k]]
+        return float(min(bound, self.total_population))
+
 
-        sites, coverage, cost = gp.multidict(site_coverage_cost)
+class CellTowerModel(CoverageData):
+    """
+    Cell tower coverage MIP, built once and kept alive between solves: the
+    budget is the RHS of the ``budget`` constraint, sites, costs, coverage and
+    populations are edited in place and each solve starts from the previous
+    solution. Sites keep their position, a removed site is only forbidden.
+    A model kept by a window gets an ``env`` of its own, see dispose.
+    """
+
+    def __init__(self, region_population, site_coverage_cost, budget, env=None, covering=None):
+        super().__init__(region_population, site_coverage_cost, covering)
 
         # MIP  model formulation
-        m = gp.Model("cell_tower")
+        m = gp.Model("cell_tower", env=env)
+        self.model = m
+        self.env = env
 
-        build = m.addVars(len(sites), vtype=GRB.BINARY, name="Build")
-        is_covered = m.addVars(len(regions), vtype=GRB.BINARY, name="Is_covered")
+        self.build = m.addVars(len(self.sites), vtype=GRB.BINARY, name="Build")
+        self.is_covered = m.addVars(len(self.regions), vtype=GRB.BINARY, name="Is_covered")
+        self.build_vars = list(self.build.values())
+        self.covered_vars = list(self.is_covered.values())
 
-        m.addConstrs((gp.quicksum(build[t] for t in sites if r in coverage[t]) >= is_covered[r]
-                      for r in regions), name="Build2cover")
-        m.addConstr(build.prod(cost) <= budget, name="budget")
+        # covered(r) <= sum of build over the sites covering r, from the
+        # inverted index in O(nonzeros)
+        self.cover = m.addMConstr(sp.hstack([self.covering, -sp.identity(len(self.regions))], format="csr"),
+                                  self.build_vars + self.covered_vars, GRB.GREATER_EQUAL,
+                                  np.zeros(len(self.regions)), name="Build2cover").tolist()
+        # by position, the site and region keys need not be 0..n-1
+        self.budget = m.addConstr(gp.LinExpr(self.cost_array.tolist(), self.build_vars) <= budget, name="budget")
         #add a constraint to ensure that at least one cell tower is built
-        m.addConstr(build.sum() >= 1, name="at_least_one")
-
-        m.setObjective(is_covered.prod(population), GRB.MAXIMIZE)
-
-        m.setParam(GRB.Param.PoolSolutions, 4)
-        m.setParam(GRB.Param.PoolSearchMode, 2)
-        m.setParam(GRB.Param.PoolGap, 0.001)
-
-        m.optimize()
-
-        print("le nombre de solution est : ", m.SolCount)
-
-        # Checking the status of the model
-        if m.status == GRB.OPTIMAL:
-            print("Une solution optimale est trouvée")
-        elif m.status == GRB.INFEASIBLE:
-            raise Exception("infeasible")
-        elif m.status == GRB.INF_OR_UNBD:
-            raise Exception("error")
-
-        # Display all solutions found in the solution pool
-
-        solutions = []
-
-        for k in range(m.SolCount):
-            m.setParam(GRB.Param.SolutionNumber, k)
-            print(f"\nSolution {k + 1}:")
-            solution_k = {}
-            towers_built_k = []
-            for tower in build.keys():
-                if abs(build[tower].getAttr(GRB.Attr.Xn) - 1) < 1e-6:
-                    print(f"Build a cell tower at location Tower {tower}.")
-                    towers_built_k.append(tower)
-            solution_k["towers_built"] = towers_built_k
-            total_cost = sum(cost[tower] * int(build[tower].getAttr(GRB.Attr.Xn)) for tower in range(len(sites)))
-            solution_k["total_cost"] = total_cost
-            budget_consumption = round(100 * total_cost / budget, 2)
-            solution_k["budget_consumption"] = budget_consumption
-            print(f"Percentage of budget consumed: {budget_consumption}%")
-            total_population = sum(population[region] for region in range(len(regions)))
-            solution_k["total_population"] = total_population
-            coverage_percentage = round(100 * is_covered.prod(population).getValue() / total_population, 2)
-            solution_k["coverage_percentage"] = coverage_percentage
-            print(f"Population coverage: {coverage_percentage}%")
-            solutions.append(solution_k)
-
-        #return solutions
-        sorted_solutions = sorted_array = sorted(solutions, key=lambda x: x['total_cost'])
-        return sorted_solutions
+        self.at_least_one = m.addConstr(self.build.sum() >= 1, name="at_least_one")
+
+        m.setObjective(gp.LinExpr(self.population_array.tolist(), self.covered_vars), GRB.MAXIMIZE)
+
+        self.site_position = {site: j for j, site in enumerate(self.sites)}
+        self.region_position = {region: i for i, region in enumerate(self.regions)}
+        # build vector of the last solve, start of the next one
+        self.solution = None
+
+    def set_budget(self, budget: float):
+        self.budget.RHS = budget
+
+    def dispose(self):
+        """
+        Free the model and the environment it was created with, which must
+        then be its own.
+        """
+        self.model.dispose()
+        if self.env is not None:
+            self.env.dispose()
+
+    def set_start(self, built):
+        """
+        MIP start from the 0/1 build vector ``built``.
+        """
+        self.model.setAttr(GRB.Attr.Start, self.build_vars, built.tolist())
+        covered = (self.covering @ built) > 0
+        self.model.setAttr(GRB.Attr.Start, self.covered_vars, covered.astype(float).tolist())
+
+    def warm_start(self, budget: float):
+        """
+        Start from the previous solution when it is still feasible, or from
+        the greedy heuristic when that covers more. Returns the heuristic
+        report, None when no site fits in the budget.
+        """
+        heuristic = self.greedy(budget)
+        start = self.solution
+        if start is not None and (self.cost_array @ start > budget or not start.any()):
+            start = None
+        if heuristic is not None:
+            built, report = heuristic
+            if start is None or report["covered_population"] > self.population_array @ ((self.covering @ start) > 0):
+                start = built
+        if start is not None:
+            self.set_start(start)
+        return heuristic[1] if heuristic is not None else None
+
+    def add_site(self, site, regions, cost: float):
+        """
+        New candidate site covering ``regions``, added as a column of the
+        existing model.
+        """
+        if site in self.site_position and self.available[self.site_position[site]]:
+            raise Exception("Le site " + str(site) + " existe déjà")
+        rows = [self.region_position[region] for region in regions if region in self.region_position]
+        j = len(self.sites)
+        column = gp.Column([1.0] * len(rows) + [cost, 1.0],
+                           [self.cover[i] for i in rows] + [self.budget, self.at_least_one])
+        var = self.model.addVar(vtype=GRB.BINARY, name="Build[" + str(j) + "]", column=column)
+
+        self.sites.append(site)
+        self.site_position[site] = j
+        self.coverage[site] = set(regions)
+        self.cost[site] = cost
+        self.build[j] = var
+        self.build_vars.append(var)
+        self.cost_array = np.append(self.cost_array, float(cost))
+        self.available = np.append(self.available, True)
+        added = sp.csr_matrix((np.ones(len(rows)), (rows, np.zeros(len(rows), dtype=int))),
+                              shape=(len(self.regions), 1))
+        self.covering = sp.hstack([self.covering, added], format="csr")
+        self.covering.data[:] = 1.0
+        if self.solution is not None:
+            self.solution = np.append(self.solution, 0.0)
+
+    def remove_site(self, site):
+        j = self._site(site)
+        self.build_vars[j].UB = 0
+        self.available[j] = False
+        if self.solution is not None:
+            self.solution[j] = 0.0
+
+    def set_cost(self, site, cost: float):
+        j = self._site(site)
+        self.model.chgCoeff(self.budget, self.build_vars[j], cost)
+        self.cost[site] = cost
+        self.cost_array[j] = cost
+
+    def set_coverage(self, site, regions):
+        j = self._site(site)
+        old = set(self.covering[:, j].nonzero()[0].tolist())
+        new = {self.region_position[region] for region in regions if region in self.region_position}
+        for i in old - new:
+            self.model.chgCoeff(self.cover[i], self.build_vars[j], 0.0)
+        for i in new - old:
+            self.model.chgCoeff(self.cover[i], self.build_vars[j], 1.0)
+        self.coverage[site] = set(regions)
+        by_site = self.covering.tocsc()
+        rows = sorted(new)
+        changed = sp.csc_matrix((np.ones(len(rows)), (rows, np.zeros(len(rows), dtype=int))),
+                                shape=(len(self.regions), 1))
+        self.covering = sp.hstack([by_site[:, :j], changed, by_site[:, j + 1:]], format="csr")
+
+    def set_population(self, region, population):
+        """
+        New population of ``region``, 0 takes the region out of the objective.
+        """
+        i = self.region_position.get(region)
+        if i is None:
+            raise Exception("Région inconnue : " + str(region))
+        self.covered_vars[i].Obj = population
+        self.total_population += population - self.population[region]
+        self.population[region] = population
+        self.population_array[i] = population
+
+    def update(self, region_population, site_coverage_cost) -> bool:
+        """
+        Apply the differences with new parameters in place. Returns False,
+        leaving the model unchanged, when the regions differ or a removed site
+        comes back: the model must then be rebuilt.
+        """
+        if list(region_population.keys()) != self.regions:
+            return False
+        if any(site in self.site_position and not self.available[self.site_position[site]]
+               for site in site_coverage_cost):
+            return False
+        for region, population in region_population.items():
+            if population != self.population[region]:
+                self.set_population(region, population)
+        for site in self.sites:
+            if site not in site_coverage_cost and self.available[self.site_position[site]]:
+                self.remove_site(site)
+        for site, (regions, cost) in site_coverage_cost.items():
+            if site not in self.site_position:
+                self.add_site(site, regions, cost)
+                continue
+            if cost != self.cost[site]:
+                self.set_cost(site, cost)
+            if set(regions) != self.coverage[site]:
+                self.set_coverage(site, regions)
+        return True
+
+    def _site(self, site) -> int:
+        j = self.site_position.get(site)
+        if j is None or not self.available[j]:
+            raise Exception("Site inconnu : " + str(site))
+        return j
+
+
+def cell_tower_problem(
+        region_population: dict[int, int],
+        site_coverage_cost: dict[int, list[set[int] | float]],
+        budget: float,
+        control: solveControl.SolveControl = None,
+        approx: bool = False,
+        covering: sp.csr_matrix = None,
+        pool: PoolOptions = None,
+        profile: str = None
+):
+    """
+    With ``approx`` only the lazy-greedy heuristic runs and its solution is
+    returned with its quality report under "approximation", otherwise the
+    heuristic solution is the MIP start of the exact solve. ``covering`` is a
+    precomputed coverage matrix replacing the coverage sets, see CoverageData.
+
+    Returns the solutions of the ``pool`` (CELL_TOWER_POOL by default, OPTIMUM
+    for the best one only), best coverage first, as a SolutionPool extracting
+    each solution when it is read. ``profile`` is the parameter profile of the
+    solve, see solverProfiles.
+    """
+    telemetry = solverTelemetry.SolveTelemetry("cell_tower")
+    try:
+        if approx:
+            with telemetry.phase("build"):
+                data = CoverageData(region_population, site_coverage_cost, covering)
+            with telemetry.phase("heuristic"):
+                heuristic = data.greedy(budget)
+            if heuristic is None:
+                raise Exception("infeasible")
+            built, report = heuristic
+            telemetry.set("approximation", report)
+            solution = data.metrics(built, budget)
+            solution["approximation"] = report
+            print(f"Solution approchée : {report['covered_population']} habitants couverts, "
+                  f"optimum au plus {report['upper_bound']}")
+            return [solution]
+
+        with telemetry.phase("build"):
+            tower = CellTowerModel(region_population, site_coverage_cost, budget, solveControl.env(control), covering)
+        return _solve_pool(tower, budget, control, telemetry, pool, profile)
     except Exception as e:
+        telemetry.set("error", str(e))
         raise Exception(e)
+    finally:
+        telemetry.emit()
 
     solutions = cell_tower_problem(
     {
@@ -97,3 +413,210 @@ def cell_tower_problem(
     print("*" * 50)
     print("*" * 50)
     print(solutions)
+
+
+def solve_cell_tower(tower: CellTowerModel, budget: float, control: solveControl.SolveControl = None,
+                     pool: PoolOptions = None, profile: str = None):
+    """
+    cell_tower_problem on a model kept alive between edits, see CellTowerModel.
+    The returned pool is read from the model, read it before the next edit.
+    """
+    telemetry = solverTelemetry.SolveTelemetry("cell_tower")
+    telemetry.set("incremental", True)
+    try:
+        return _solve_pool(tower, budget, control, telemetry, pool, profile)
+    except Exception as e:
+        telemetry.set("error", str(e))
+        raise Exception(e)
+    finally:
+        telemetry.emit()
+
+
+def _solve_pool(tower, budget, control, telemetry, pool, profile):
+    m = tower.model
+    tower.set_budget(budget)
+    with telemetry.phase("heuristic"):
+        report = tower.warm_start(budget)
+    if report is not None:
+        telemetry.set("approximation", report)
+
+    (pool or CELL_TOWER_POOL).apply(m)
+    telemetry.set("params", solverProfiles.apply(m, "cell_tower", profile))
+
+    solveControl.optimize(m, control, telemetry)
+    solveControl.check_limit(m)
+
+    print("le nombre de solution est : ", m.SolCount)
+
+    # Checking the status of the model
+    if m.status == GRB.OPTIMAL:
+        print("Une solution optimale est trouvée")
+    elif m.status == GRB.INFEASIBLE:
+        raise Exception("infeasible")
+    elif m.status == GRB.INF_OR_UNBD:
+        raise Exception("error")
+    if m.SolCount > 0:
+        tower.solution = np.round(m.getAttr(GRB.Attr.X, tower.build_vars))
+
+    # Solutions of the pool, displayed as they are extracted
+
+    def extract(k):
+        m.setParam(GRB.Param.SolutionNumber, k)
+        print(f"\nSolution {k + 1}:")
+        # coverage of the towers of this solution, not the incumbent's
+        solution_k = tower.metrics(np.round(m.getAttr(GRB.Attr.Xn, tower.build_vars)), budget)
+        for t in solution_k["towers_built"]:
+            print(f"Build a cell tower at location Tower {t}.")
+        print(f"Percentage of budget consumed: {solution_k['budget_consumption']}%")
+        print(f"Population coverage: {solution_k['coverage_percentage']}%")
+        return solution_k
+
+    return SolutionPool(m.SolCount, extract, *solveControl.solve_status(m))
+
+
+def coverage_frontier(
+        region_population: dict[int, int],
+        site_coverage_cost: dict[int, list[set[int] | float]],
+        budgets: list[float],
+        control: solveControl.SolveControl = None,
+        covering: sp.csr_matrix = None,
+        profile: str = None
+):
+    """
+    Coverage versus budget curve: the model is built once and solved for each
+    budget in increasing order, only the RHS of the budget constraint changes
+    and each solve starts from the previous optimum, which stays feasible when
+    the budget grows. Once every region is covered the remaining budgets are
+    not solved. Returns one point per budget with the metrics of
+    cell_tower_problem, ``budget`` and the ``status`` and ``gap`` of its
+    solve (see solveControl.solve_status), ``coverage_percentage`` is None
+    when no solution was found. ``profile`` applies to every level.
+    """
+    with solverTelemetry.recording("cell_tower_frontier") as telemetry:
+        budgets = sorted(set(budgets))
+        if not budgets:
+            return []
+        with telemetry.phase("build"):
+            tower = CellTowerModel(region_population, site_coverage_cost, budgets[-1], solveControl.env(control),
+                                   covering)
+            m = tower.model
+            m.setParam(GRB.Param.OutputFlag, 0)
+            telemetry.set("params", solverProfiles.apply(m, "cell_tower", profile))
+        telemetry.set("levels", len(budgets))
+
+        frontier = []
+        saturated = False
+        for budget in budgets:
+            if saturated:
+                # every region is covered, a larger budget changes nothing
+                frontier.append({"budget": budget, **tower.metrics(built, budget), "status": GRB.OPTIMAL, "gap": 0.0})
+                continue
+            tower.set_budget(budget)
+            solveControl.optimize(m, control, telemetry)
+            status, gap = solveControl.solve_status(m)
+            if m.SolCount == 0:
+                frontier.append({"budget": budget, "towers_built": [], "total_cost": 0.0,
+                                 "budget_consumption": 0.0, "total_population": tower.total_population,
+                                 "coverage_percentage": None, "status": status, "gap": gap})
+                continue
+            built = np.round(m.getAttr(GRB.Attr.X, tower.build_vars))
+            frontier.append({"budget": budget, **tower.metrics(built, budget), "status": status, "gap": gap})
+            saturated = m.Status == GRB.OPTIMAL and m.ObjVal >= tower.total_population - 0.5
+            # warm start of the next, larger budget
+            tower.set_start(built)
+        return frontier
+
+
+def cell_tower_scenarios(
+        scenarios: list[dict[int, int]],
+        site_coverage_cost: dict[int, list[set[int] | float]],
+        budget: float,
+        workers: int = None,
+        threads: int = 1,
+        covering: sp.csr_matrix = None
+):
+    """
+    Solve cell_tower_problem for every population scenario (the same regions
+    as the first one) on a pool of ``workers`` processes using ``threads``
+    Gurobi threads each.
+
+    The coverage matrix is built once and placed in shared memory, each worker
+    attaches to it when it starts instead of receiving it with every scenario.
+
+    Returns a table with one row per scenario (towers built, cost, budget
+    consumption and coverage of the best solution, or the error) and the
+    fraction of the scenarios selecting each site.
+    """
+    regions = list(scenarios[0].keys())
+    data = CoverageData(scenarios[0], site_coverage_cost, covering)
+    if workers is None:
+        workers = max(1, (os.cpu_count() or 1) // max(threads, 1))
+
+    arrays = [data.covering.indptr, data.covering.indices]
+    blocks = []
+    try:
+        for array in arrays:
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[:] = array
+            blocks.append(block)
+        layout = [(block.name, array.shape, array.dtype.str) for block, array in zip(blocks, arrays)]
+
+        rows = [None] * len(scenarios)
+        with ProcessPoolExecutor(workers, initializer=_init_scenario_worker,
+                                 initargs=(layout, data.covering.shape, regions, data.sites,
+                                           data.cost_array, threads)) as executor:
+            futures = {executor.submit(_solve_scenario, [scenario[region] for region in regions], budget): i
+                       for i, scenario in enumerate(scenarios)}
+            for future in as_completed(futures):
+                rows[futures[future]] = future.result()
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    table = pd.DataFrame(rows)
+    table.index.name = "scenario"
+    selected = pd.Series(0.0, index=data.sites, name="selection_frequency")
+    for towers in table["towers_built"]:
+        selected.loc[towers] += 1
+    selected /= len(scenarios)
+    return table, selected
+
+
+# coverage data of a scenario worker, attached once in _init_scenario_worker
+_scenario_data = {}
+
+
+def _init_scenario_worker(layout, shape, regions, sites, costs, threads):
+    blocks = [shared_memory.SharedMemory(name=name) for name, _, _ in layout]
+    indptr, indices = [np.ndarray(array_shape, dtype, buffer=block.buf)
+                       for block, (_, array_shape, dtype) in zip(blocks, layout)]
+    _scenario_data.update(
+        blocks=blocks,
+        covering=sp.csr_matrix((np.ones(len(indices)), indices, indptr), shape=shape),
+        regions=regions,
+        site_coverage_cost={site: [None, cost] for site, cost in zip(sites, costs)},
+        threads=threads,
+    )
+    # one environment for all the scenarios of the worker
+    solveControl.process_env()
+
+
+def _solve_scenario(population, budget):
+    # the process environment is shared, close leaves it open
+    control = solveControl.SolveControl(threads=_scenario_data["threads"], env=solveControl.process_env())
+    try:
+        best = cell_tower_problem(dict(zip(_scenario_data["regions"], population)),
+                                  _scenario_data["site_coverage_cost"], budget, control,
+                                  covering=_scenario_data["covering"], pool=OPTIMUM)[0]
+    except Exception as e:
+        return {"towers_built": [], "error": str(e)}
+    finally:
+        control.close()
+    return {
+        "towers_built": best["towers_built"],
+        "total_cost": best["total_cost"],
+        "budget_consumption": best["budget_consumption"],
+        "coverage_percentage": best["coverage_percentage"],
+        "error": None,
+    }
@@ -11,17 +11,29 @@ import numpy
 
 
 from PyQt5 import QtCore, QtGui, QtWidgets
+import gurobipy as gp
 
-from CellTowerCoverageModule import cell_tower_problem
+import coverageGeometry
+import solveControl
+from CellTowerCoverageModule import CellTowerModel, coverage_frontier, solve_cell_tower
 from controlinput import is_float, is_int
-from RessourceModule import handle
+from edgeListEditor import EdgeTableModel
+from frontierPlot import FrontierPlot
+from RessourceModule import ResourcePlanModel, solve_resource_plan
 from shortestPathModel import shortest_path
+from solveWorkers import SolveManager
+from telemetryPanel import TelemetryPanel
 
 
 class Ui_MainWindow(object):
 
     shortestPathData = []
     paths = {}
+    shortestPathResult = None
+    cellTowerModel = None
+    resourcePlanModel = None
+    # parameter profile of the solves started from the window
+    solverProfile = "interactive"
     profit = {}
     time_req = {}
     max_sales = {}
@@ -355,6 +367,8 @@ class Ui_MainWindow(object):
         self.tableView_3 = QtWidgets.QTableView(self.page_2_TSP)
         self.tableView_3.setGeometry(QtCore.QRect(30, 40, 751, 361))
         self.tableView_3.setObjectName("tableView_3")
+        self.pasteEdgesShortcut = QtWidgets.QShortcut(QtGui.QKeySequence.Paste, self.tableView_3)
+        self.pasteEdgesShortcut.activated.connect(self.pasteedges)
         self.lineEdit_7 = QtWidgets.QLineEdit(self.page_2_TSP)
         self.lineEdit_7.setGeometry(QtCore.QRect(120, 440, 181, 22))
         self.lineEdit_7.setObjectName("lineEdit_7")
@@ -708,6 +722,11 @@ class Ui_MainWindow(object):
 "    color : white;\n"
 "}")
         self.resoudre_6.setObjectName("resoudre_6")
+        self.importcoordonnees = QtWidgets.QPushButton(self.page)
+        self.importcoordonnees.setGeometry(QtCore.QRect(560, 540, 131, 32))
+        self.importcoordonnees.setStyleSheet(self.resoudre_6.styleSheet())
+        self.importcoordonnees.setObjectName("importcoordonnees")
+        self.importcoordonnees.clicked.connect(self.importgeometry)
         self.stackedWidget.addWidget(self.page)
         self.page_2 = QtWidgets.QWidget()
         self.page_2.setObjectName("page_2")
@@ -800,7 +819,7 @@ class Ui_MainWindow(object):
         self.page_4.setObjectName("page_4")
 
         self.scrollArea = QtWidgets.QScrollArea(self.page_4)
-        self.scrollArea.setGeometry(QtCore.QRect(30, 30, 771, 441))
+        self.scrollArea.setGeometry(QtCore.QRect(30, 30, 771, 231))
         self.scrollArea.setWidgetResizable(True)
         self.scrollArea.setObjectName("scrollArea")
 
@@ -813,11 +832,34 @@ class Ui_MainWindow(object):
                                         "font-weight : bold;\n"
                                         "}")
         self.scrollArea.setWidget(self.rescelltower)
+        self.frontierPlot = FrontierPlot(self.page_4)
+        self.frontierPlot.setGeometry(QtCore.QRect(30, 270, 771, 231))
+        self.frontierPlot.setObjectName("frontierPlot")
+        self.calculerfrontiere = QtWidgets.QPushButton(self.page_4)
+        self.calculerfrontiere.setGeometry(QtCore.QRect(620, 540, 181, 32))
+        self.calculerfrontiere.setStyleSheet(self.resoudre_6.styleSheet())
+        self.calculerfrontiere.setObjectName("calculerfrontiere")
+        self.calculerfrontiere.clicked.connect(self.computefrontier)
         self.stackedWidget.addWidget(self.page_4)
         MainWindow.setCentralWidget(self.centralwidget)
         self.actionTSP = QtWidgets.QAction(MainWindow)
         self.actionTSP.setObjectName("actionTSP")
 
+        self.solveManager = SolveManager(parent=MainWindow)
+        self.solveManager.changed.connect(self.updatesolvestatus)
+        self.solveStatus = QtWidgets.QLabel()
+        self.annuler = QtWidgets.QPushButton("Annuler")
+        self.annuler.setEnabled(False)
+        self.annuler.clicked.connect(self.solveManager.cancel_all)
+        MainWindow.statusBar().addWidget(self.solveStatus, 1)
+        MainWindow.statusBar().addPermanentWidget(self.annuler)
+        self.telemetryPanel = TelemetryPanel(MainWindow)
+        self.telemetryPanel.hide()
+        MainWindow.addDockWidget(QtCore.Qt.BottomDockWidgetArea, self.telemetryPanel)
+        self.telemetryButton = QtWidgets.QToolButton()
+        self.telemetryButton.setDefaultAction(self.telemetryPanel.toggleViewAction())
+        MainWindow.statusBar().addPermanentWidget(self.telemetryButton)
+
         self.retranslateUi(MainWindow)
         self.stackedWidget.setCurrentIndex(9)
         QtCore.QMetaObject.connectSlotsByName(MainWindow)
@@ -859,6 +901,8 @@ class Ui_MainWindow(object):
         self.label_8.setText(_translate("MainWindow", "Profit"))
         self.label_9.setText(_translate("MainWindow", ""))
         self.resoudre_6.setText(_translate("MainWindow", "suivant >"))
+        self.importcoordonnees.setText(_translate("MainWindow", "coordonnées..."))
+        self.calculerfrontiere.setText(_translate("MainWindow", "couverture / budget"))
         self.precedent_6.setText(_translate("MainWindow", "Precedent"))
         self.suivant5.setText(_translate("MainWindow", "suivant >"))
         self.precedent_7.setText(_translate("MainWindow", "Precedent"))
@@ -899,74 +943,73 @@ class Ui_MainWindow(object):
         self.shortestPathData = []
         self.listView.setModel(model)
     def insertdatashortestpath(self):
-        model = QtGui.QStandardItemModel()
-        n = len(self.shortestPathData)
-        model.setRowCount(n+1)
-        model.setColumnCount(n+1)
-
-        for i in range(n):
-            item_row = QtGui.QStandardItem(self.shortestPathData[n-i - 1])
-            item_column = QtGui.QStandardItem(self.shortestPathData[n-i-1])
-            model.setItem(i+1, 0, item_row)
-            model.setItem(0, i+1, item_column)
-        for i in range(n):
-            item = QtGui.QStandardItem("X")
-            model.setItem(i+1, i+1, item)
+        model = EdgeTableModel()
         self.tableView_3.setModel(model)
+        self.tableView_3.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Stretch)
         self.next_index()
 
-
+    def pasteedges(self):
+        model = self.tableView_3.model()
+        if isinstance(model, EdgeTableModel):
+            model.paste_text(QtWidgets.QApplication.clipboard().text())
 
     def shortestpath(self):
         start = self.lineEdit_7.text()
         end = self.lineEdit_8.text()
         model = self.tableView_3.model()
-        n = model.rowCount()
         is_valid = True
-        matrix = {}
-        for i in range(1,n):
-            row = []
-            for j in range(1,n):
-                if (i!=j and model.item(i,j)!=None and model.item(i, j).text() != "" ):
-                    item = model.item(i, j).text()
-                    if(not(is_float(item))):
-                        msg = QtWidgets.QMessageBox()
-                        msg.setIcon(QtWidgets.QMessageBox.Warning)
-                        msg.setText("Wrong input in cell ("+str(i)+","+str(j)+")")
-                        msg.setInformativeText("Please enter a float number")
-                        msg.setWindowTitle("Error")
-                        msg.exec_()
-                        is_valid = False
-                    else:
-                        node1 = model.item(i, 0).text()
-                        node2 = model.item(0, j).text()
-                        matrix[(node1,node2)] = float(item)
+        try:
+            matrix = model.edges(self.shortestPathData)
+        except Exception as e:
+            msg = QtWidgets.QMessageBox()
+            msg.setIcon(QtWidgets.QMessageBox.Warning)
+            msg.setText("Wrong input in the edge list")
+            msg.setInformativeText(e.__str__())
+            msg.setWindowTitle("Error")
+            msg.exec_()
+            is_valid = False
 
         if is_valid:
-
-            try:
-                value,thePath = shortest_path(start,end,matrix)
-                data = "le chemin le plus court de " + start + " à " + end + " est " + str(value) + " avec les chemins: \n"
-                for i in thePath:
-                    for j in i:
-                        data += j + " -> "
-                    data = data[:-3]
-                    data+="\n"
-                self.resultTSP.setText(data)
-                print(thePath)
-                self.paths = matrix
-                self.next_index()
-            except Exception as e:
-                msg = QtWidgets.QMessageBox()
-                msg.setIcon(QtWidgets.QMessageBox.Warning)
-                msg.setText("Error")
-                msg.setInformativeText(e.__str__())
-                msg.setWindowTitle("Error")
-                msg.exec_()
+            self.startsolve(self.resoudre1, shortest_path, start, end, matrix, backend="auto", render=False,
+                            profile=self.solverProfile, on_finished=lambda result: self.showshortestpath(start, end, matrix, result))
+    def showshortestpath(self, start, end, matrix, result):
+        value,thePath = result
+        data = "le chemin le plus court de " + start + " à " + end + " est " + str(value) + " avec les chemins: \n"
+        data += self.solvewarning(result.status, result.gap)
+        for i in thePath:
+            for j in i:
+                data += j + " -> "
+            data = data[:-3]
+            data+="\n"
+        self.resultTSP.setText(data)
+        print(thePath)
+        self.paths = matrix
+        self.shortestPathResult = result
+        self.setindex(self.stackedWidget.indexOf(self.page_3_TSP))
     def getshortestpath(self):
         print("getshortestpath")
-        path_to_html_file = "shortest-path.html"
-        QtGui.QDesktopServices.openUrl(QtCore.QUrl.fromLocalFile(path_to_html_file))
+        if self.shortestPathResult is None:
+            return
+        # the graph is rendered on a background thread, poll until it is ready
+        self.renderFuture = self.shortestPathResult.render()
+        self.renderTimer = QtCore.QTimer()
+        self.renderTimer.timeout.connect(self.openshortestpath)
+        self.renderTimer.start(100)
+    def openshortestpath(self):
+        if not self.renderFuture.done():
+            return
+        self.renderTimer.stop()
+        try:
+            path_to_html_file = self.renderFuture.result()
+        except Exception as e:
+            msg = QtWidgets.QMessageBox()
+            msg.setIcon(QtWidgets.QMessageBox.Warning)
+            msg.setText("Error")
+            msg.setInformativeText(e.__str__())
+            msg.setWindowTitle("Error")
+            msg.exec_()
+            return
+        QtGui.QDesktopServices.openUrl(QtCore.QUrl.fromLocalFile(QtCore.QDir.current().filePath(path_to_html_file)))
     def getproducts(self):
         if(self.duree.text() == "" or not(is_int(self.duree.text()))) or int(self.duree.text()) <= 0:
             msg = QtWidgets.QMessageBox()
@@ -1145,7 +1188,32 @@ class Ui_MainWindow(object):
         capaciteStock = float(self.capacitestock.text())
         # stockdernier = float(self.stockdernier.text())
         duretravail = float(self.duretravail.text())
-        v = handle(self.months,self.profit,self.ressourcesList,self.time_req,self.max_sales,coutStock,capaciteStock,0,duretravail)
+        # the worker gets a copy of the tables, they can be edited during the solve
+        self.startsolve(self.resoudre_5, self.solveresourceplan, list(self.months), dict(self.profit),
+                        dict(self.ressourcesList),
+                        {ressource: dict(required) for ressource, required in self.time_req.items()},
+                        dict(self.max_sales), coutStock, capaciteStock, 0, duretravail,
+                        profile=self.solverProfile, on_finished=self.showprob2)
+
+    def solveresourceplan(self, *data, control=None, profile=None):
+        # runs on the solve worker: the model of the previous solve is edited
+        # in place when only gains, bounds, installed ressources, costs or the
+        # work duration changed, otherwise rebuilt in an environment of its own
+        try:
+            if self.resourcePlanModel is None or not self.resourcePlanModel.update(*data):
+                self.disposemodel("resourcePlanModel")
+                env = gp.Env()
+                try:
+                    self.resourcePlanModel = ResourcePlanModel(*data, env=env)
+                except Exception:
+                    env.dispose()
+                    raise
+        except Exception:
+            self.disposemodel("resourcePlanModel")
+            raise
+        return solve_resource_plan(self.resourcePlanModel, control, profile=profile)
+
+    def showprob2(self, v):
         if (len(v) == 0):
             self.label_9.setStyleSheet(
                 "QLabel{\n"
@@ -1164,6 +1232,7 @@ class Ui_MainWindow(object):
                 "}"
             )
             data = "Number of Solution = " + str(len(v)) + "\n"
+            data += self.solvewarning(v.status, v.gap)
             for i in range(len(v)):
                 data += "objective_value : \n" + str(v[i]['objective_value']) + "\n"
                 data += "tasks plan : \n" + str(v[i]['tasks_plan']) + "\n"
@@ -1171,7 +1240,7 @@ class Ui_MainWindow(object):
                 data += "inventory_plan : \n"+str(v[i]['inventory_plan']) + "\n"
             self.label_9.setText(data)
         #print(v)
-        self.next_index()
+        self.setindex(self.stackedWidget.indexOf(self.result))
 
     def getdata(self):
         if self.region_number.text()=="" or not(is_int(self.region_number.text())) or int(self.region_number.text()) < 0:
@@ -1266,6 +1335,39 @@ class Ui_MainWindow(object):
             self.site_coverage_cost[i-1].append(coverge_set)
         self.next_index()
 
+    def importgeometry(self):
+        # coverage computed from the site coordinates and radius and the
+        # region centroids instead of the 0/1 matrix
+        if self.tableView_4.model() is None:
+            msg = QtWidgets.QMessageBox()
+            msg.setIcon(QtWidgets.QMessageBox.Warning)
+            msg.setText("Empty input")
+            msg.setInformativeText("Please enter the region and tower numbers first")
+            msg.setWindowTitle("Error")
+            msg.exec_()
+            return
+        sites_path, _ = QtWidgets.QFileDialog.getOpenFileName(None, "Sites : x, y, rayon", "", "CSV (*.csv *.txt)")
+        if not sites_path:
+            return
+        regions_path, _ = QtWidgets.QFileDialog.getOpenFileName(None, "Régions : x, y", "", "CSV (*.csv *.txt)")
+        if not regions_path:
+            return
+        try:
+            sites = coverageGeometry.load_points(sites_path)
+            regions = coverageGeometry.load_points(regions_path)
+            if sites.shape != (len(self.listtower), 3) or regions.shape[0] != len(self.listregion) \
+                    or regions.shape[1] < 2:
+                raise Exception("Attendu " + str(len(self.listtower)) + " sites (x, y, rayon) et "
+                                + str(len(self.listregion)) + " régions (x, y)")
+            covering = coverageGeometry.coverage_matrix(sites[:, :2], sites[:, 2], regions[:, :2])
+        except Exception as e:
+            self.solvefailed(e)
+            return
+        # the costs are appended on the cost page
+        self.site_coverage_cost = {site: [regions] for site, (regions, _) in
+                                   coverageGeometry.site_coverage_cost(covering, numpy.zeros(covering.shape[1])).items()}
+        self.next_index()
+
     def regionpopulation(self):
         model = self.tableView_5.model()
         self.region_population = {}
@@ -1325,31 +1427,105 @@ class Ui_MainWindow(object):
                 msg.exec_()
                 return
             value = float(model.item(i,1).text())
-            self.site_coverage_cost[i-1].append(value)
-        try :
-            res = cell_tower_problem(self.region_population,self.site_coverage_cost,self.allocated_budget)
-            data = ""
-            data += "Nombre de  Solution = " + str(len(res)) + "\n"
-            for i in range(len(res)):
-                data += "Solution "+str(i+1)+"\n"
-                data += "Construction de la tour:\n"
-                for j in range(len(res[i]['towers_built'])):
-                    data += self.listtower[res[i]['towers_built'][j]] + " "
-                data+= "\n"
-                data+="Coût total : \n"
-                data+= str(res[i]['total_cost']) + "\n"
-                data+="consommation budgétaire : " +str(res[i]['budget_consumption'])+"%"+ "\n"
-                data+="Population Totale : "+str(res[i]['total_population'])+"\n"
-                data+="pourcentage de couverture : "+str(res[i]['coverage_percentage'])+"%"+ "\n"
-            self.rescelltower.setText(data)
-            self.next_index()
-        except Exception as e:
-            msg = QtWidgets.QMessageBox()
-            msg.setIcon(QtWidgets.QMessageBox.Warning)
-            msg.setText("Error")
-            msg.setInformativeText(e.__str__())
-            msg.setWindowTitle("Error")
-            msg.exec_()
+            self.site_coverage_cost[i-1][1:] = [value]
+        # the worker gets a copy of the tables, they can be edited during the solve
+        self.startsolve(self.resoudre_8, self.solvecelltower, dict(self.region_population),
+                        {site: [set(regions), cost] for site, (regions, cost) in self.site_coverage_cost.items()},
+                        self.allocated_budget, profile=self.solverProfile, on_finished=self.showcelltower)
+
+    def solvecelltower(self, region_population, site_coverage_cost, budget, control=None, profile=None):
+        # runs on the solve worker: the model of the previous solve is edited
+        # in place when only costs, coverage, populations or sites changed,
+        # otherwise rebuilt in an environment of its own, Gurobi environments
+        # are not shared between threads
+        try:
+            if self.cellTowerModel is None or not self.cellTowerModel.update(region_population, site_coverage_cost):
+                self.disposemodel("cellTowerModel")
+                env = gp.Env()
+                try:
+                    self.cellTowerModel = CellTowerModel(region_population, site_coverage_cost, budget, env=env)
+                except Exception:
+                    env.dispose()
+                    raise
+        except Exception:
+            self.disposemodel("cellTowerModel")
+            raise
+        return solve_cell_tower(self.cellTowerModel, budget, control, profile=profile)
+
+    def disposemodel(self, name):
+        model = getattr(self, name)
+        setattr(self, name, None)
+        if model is not None:
+            model.dispose()
+
+    def showcelltower(self, res):
+        data = ""
+        data += "Nombre de  Solution = " + str(len(res)) + "\n"
+        data += self.solvewarning(res.status, res.gap)
+        for i in range(len(res)):
+            data += "Solution "+str(i+1)+"\n"
+            data += "Construction de la tour:\n"
+            # the sites are keyed by their position in listtower
+            for j in range(len(res[i]['towers_built'])):
+                data += self.listtower[res[i]['towers_built'][j]] + " "
+            data+= "\n"
+            data+="Coût total : \n"
+            data+= str(res[i]['total_cost']) + "\n"
+            data+="consommation budgétaire : " +str(res[i]['budget_consumption'])+"%"+ "\n"
+            data+="Population Totale : "+str(res[i]['total_population'])+"\n"
+            data+="pourcentage de couverture : "+str(res[i]['coverage_percentage'])+"%"+ "\n"
+        self.rescelltower.setText(data)
+        self.frontierPlot.set_frontier([])
+        self.setindex(self.stackedWidget.indexOf(self.page_4))
+
+    def computefrontier(self):
+        # coverage versus budget curve, from the cheapest site to every site built
+        costs = [site[1] for site in self.site_coverage_cost.values()]
+        budgets = numpy.linspace(min(costs), sum(costs), 20).tolist() + [self.allocated_budget]
+        self.frontierPlot.set_frontier([])
+        # copies, as for resoudrecellTower
+        self.startsolve(self.calculerfrontiere, coverage_frontier, dict(self.region_population),
+                        {site: [set(regions), cost] for site, (regions, cost) in self.site_coverage_cost.items()},
+                        budgets, profile=self.solverProfile, on_finished=self.showfrontier)
+
+    def showfrontier(self, frontier):
+        self.frontierPlot.set_frontier(frontier, self.allocated_budget)
+
+    def startsolve(self, button, function, *args, on_finished, **kwargs):
+        # the solve runs on a worker thread, the button is disabled until it ends
+        button.setEnabled(False)
+        def finished(result):
+            button.setEnabled(True)
+            on_finished(result)
+        def failed(e):
+            button.setEnabled(True)
+            self.solvefailed(e)
+        self.solveManager.submit(function, *args, on_finished=finished, on_failed=failed,
+                                 on_progress=self.solveprogress, **kwargs)
+
+    def solvewarning(self, status, gap):
+        # shown above a result stopped by a limit of the solver profile
+        warning = solveControl.describe(status, gap)
+        return warning + "\n" if warning else ""
+
+    def solvefailed(self, e):
+        msg = QtWidgets.QMessageBox()
+        msg.setIcon(QtWidgets.QMessageBox.Warning)
+        msg.setText("Error")
+        msg.setInformativeText(e.__str__())
+        msg.setWindowTitle("Error")
+        msg.exec_()
+
+    def solveprogress(self, info):
+        text = "Résolution en cours : " + info["model"] + " " + str(round(info["runtime"], 1)) + "s"
+        if info.get("gap") is not None:
+            text += ", gap " + str(round(100 * info["gap"], 2)) + "%"
+        self.solveStatus.setText(text)
+
+    def updatesolvestatus(self):
+        running = self.solveManager.running()
+        self.annuler.setEnabled(running > 0)
+        self.solveStatus.setText("" if running == 0 else str(running) + " résolution(s) en cours")
 
 
 
@@ -1,102 +1,396 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import numpy as np
 import pandas as pd
+import scipy.sparse as sp
 
 import gurobipy as gp
 from gurobipy import GRB
 
+import solveControl
+import solverProfiles
+import solverTelemetry
+from solutionPool import OPTIMUM, PoolOptions, SolutionPool
+
+# pool of handle when none is given
+RESOURCE_POOL = PoolOptions(1000, 2, 0.10)
+# pool members whose values are equal once rounded to this many decimals,
+# the precision of the plans, are returned once
+DUPLICATE_DECIMALS = 1
+
+
+
+
+def handle(periods, gain, installed, time_req, max_do, holding_cost, max_inventory, store_target, total_work, control=None,
+           pool=None, profile=None, sink=None, verbose=False):
+    """
+    Returns the plans of the ``pool`` (RESOURCE_POOL by default), best first,
+    as a SolutionPool building each plan when it is read, and printing it
+    when ``verbose``. ``profile`` is the parameter profile of the solve, see
+    solverProfiles. Each distinct plan is also written to ``sink``, a
+    planArchive.PlanWriter, as it is extracted.
+    """
+    with solverTelemetry.recording("resource") as telemetry:
+        return _handle(periods, gain, installed, time_req, max_do, holding_cost, max_inventory, store_target,
+                       total_work, control, telemetry, pool or RESOURCE_POOL, profile, sink=sink, verbose=verbose)
+
+
+def _handle(periods, gain, installed, time_req, max_do, holding_cost, max_inventory, store_target, total_work, control, telemetry, pool, profile,
+            initial_store=None, sink=None, verbose=False):
+    with telemetry.phase("build"):
+        plan = ResourcePlanModel(periods, gain, installed, time_req, max_do, holding_cost, max_inventory, store_target,
+                                 total_work, env=solveControl.env(control), initial_store=initial_store)
+    return _solve_plans(plan, control, telemetry, pool, profile, sink, verbose)
+
+
+class ResourcePlanModel:
+    """
+    Multi-resource allocation LP, built once and kept alive between solves:
+    gains and the holding cost are objective coefficients, max_do and
+    max_inventory bounds, installed ressources and the work duration the RHS
+    of the capacity rows, all edited in place. A re-solve starts from the
+    basis of the previous one. ``initial_store`` is the inventory per task
+    before the first period, a None ``store_target`` leaves the last
+    inventory free. A model kept by a window gets an ``env`` of its own, see
+    dispose.
+    """
+
+    def __init__(self, periods, gain, installed, time_req, max_do, holding_cost, max_inventory, store_target,
+                 total_work, env=None, initial_store=None):
+        # PARAMETERS
+        self.periods = list(periods)
+        self.tasks = list(gain.keys())
+        self.ressources = list(installed.keys())
+        self.gain = dict(gain)
+        self.installed = dict(installed)
+        # copied, the caller's tables are compared with it in update
+        self.time_req = {ressource: dict(required) for ressource, required in time_req.items()}
+        self.holding_cost = holding_cost
+        self.store_target = store_target
+        self.total_work = total_work
+
+        P, T = len(self.periods), len(self.tasks)
+        # current (period, task) bounds, the attributes of a model never
+        # optimized cannot be read back
+        self.max_do = np.broadcast_to(_bounds(max_do, self.periods, self.tasks), (P, T)).astype(float)
+        self.max_inventory = np.broadcast_to(_bounds(max_inventory, self.periods, self.tasks), (P, T)).astype(float)
+        requirement = _requirement_matrix(self.tasks, self.ressources, time_req)
+        gain_vector = np.array([gain[task] for task in self.tasks], dtype=float)
+
+        model = gp.Model('Multi-resource Allocation Problem', env=env)
+        self.model = model
+        self.env = env
+
+        # Variables, (period, task) blocks
+
+        self.do = model.addMVar((P, T), name="Do") # units of a task to be done in a period
+        self.store = model.addMVar((P, T), ub=self.max_inventory, name="Store") # units of a task to defer in a period
+        self.make = model.addMVar((P, T), ub=self.max_do, name="Make") # units of a task done in a period
+
+
+        # Constraints
+
+        # flattened period-major, (period, task) is p * T + t
+        do_flat, make_flat, store_flat = self.do.reshape(-1), self.make.reshape(-1), self.store.reshape(-1)
+
+        # initial balance
+        initial = 0 if initial_store is None else -np.asarray(initial_store, dtype=float)
+        self.balance0 = model.addConstr(do_flat[:T] - make_flat[:T] - store_flat[:T] == initial, name="Initial Balance")
+
+        # balance, stored(p) - stored(p - 1) as one sparse difference matrix
+        stored = sp.identity(P * T, format="csr") - sp.kron(sp.eye(P, k=-1), sp.identity(T), format="csr")
+        self.balance = model.addConstr(do_flat[T:] - make_flat[T:] - stored[T:] @ store_flat == 0, name="Balance")
+
+        # task accomplishment
+        self.inventory = None
+        if store_target is not None:
+            self.inventory = model.addConstr(self.store[-1, :] == store_target, name="Inventory_Target")
+
+        # ressource capacity, one (ressource x task) requirement block per
+        # period: the row of ressource r in period p is p * R + r
+        self.capacity = model.addConstr(sp.kron(sp.identity(P), requirement, format="csr") @ do_flat
+                                        <= np.tile(self._capacity_rhs(), P), name="Capacity")
+
+        # Objective Function
+        objective = (self.make @ gain_vector).sum() - holding_cost * self.store.sum()
+        model.setObjective(objective,GRB.MAXIMIZE)
+
+    def dispose(self):
+        """
+        Free the model and the environment it was created with, which must
+        then be its own.
+        """
+        self.model.dispose()
+        if self.env is not None:
+            self.env.dispose()
+
+    def set_gain(self, task, gain: float):
+        self.make[:, self._task(task)].Obj = gain
+        self.gain[task] = gain
+
+    def set_holding_cost(self, holding_cost: float):
+        self.store.Obj = -holding_cost
+        self.holding_cost = holding_cost
+
+    def set_max_do(self, period, task, bound: float):
+        p, t = self._period(period), self._task(task)
+        self.make[p, t].UB = bound
+        self.max_do[p, t] = bound
+
+    def set_max_inventory(self, max_inventory):
+        """
+        Inventory capacity common to every (period, task) or a dict keyed by
+        (period, task).
+        """
+        self.max_inventory = np.broadcast_to(_bounds(max_inventory, self.periods, self.tasks),
+                                             self.max_inventory.shape).astype(float)
+        self.store.UB = self.max_inventory
+
+    def set_installed(self, ressource, installed):
+        if ressource not in self.installed:
+            raise Exception("Ressource inconnue : " + str(ressource))
+        self.installed[ressource] = installed
+        self.capacity[self.ressources.index(ressource)::len(self.ressources)].RHS = self.total_work * installed
+
+    def set_total_work(self, total_work: float):
+        self.total_work = total_work
+        self.capacity.RHS = np.tile(self._capacity_rhs(), len(self.periods))
+
+    def update(self, periods, gain, installed, time_req, max_do, holding_cost, max_inventory, store_target,
+               total_work) -> bool:
+        """
+        Apply the differences with new parameters in place. Returns False,
+        leaving the model unchanged, when the periods, tasks, ressources,
+        required times or inventory target differ: the model must then be
+        rebuilt.
+        """
+        if (list(periods) != self.periods or list(gain.keys()) != self.tasks
+                or list(installed.keys()) != self.ressources or time_req != self.time_req
+                or store_target != self.store_target):
+            return False
+        for task, value in gain.items():
+            if value != self.gain[task]:
+                self.set_gain(task, value)
+        if holding_cost != self.holding_cost:
+            self.set_holding_cost(holding_cost)
+        # bounds are compared and written as whole blocks
+        bounds = _bounds(max_do, self.periods, self.tasks)
+        if np.any(self.max_do != bounds):
+            self.max_do = np.broadcast_to(bounds, self.max_do.shape).astype(float)
+            self.make.UB = self.max_do
+        if np.any(self.max_inventory != _bounds(max_inventory, self.periods, self.tasks)):
+            self.set_max_inventory(max_inventory)
+        if total_work != self.total_work:
+            self.installed.update(installed)
+            self.set_total_work(total_work)
+        else:
+            for ressource, count in installed.items():
+                if count != self.installed[ressource]:
+                    self.set_installed(ressource, count)
+        return True
+
+    def _capacity_rhs(self):
+        return self.total_work * np.array([self.installed[ressource] for ressource in self.ressources], dtype=float)
+
+    def _task(self, task) -> int:
+        if task not in self.gain:
+            raise Exception("Tâche inconnue : " + str(task))
+        return self.tasks.index(task)
+
+    def _period(self, period) -> int:
+        if period not in self.periods:
+            raise Exception("Période inconnue : " + str(period))
+        return self.periods.index(period)
+
+
+def solve_resource_plan(plan: ResourcePlanModel, control: solveControl.SolveControl = None, pool: PoolOptions = None,
+                        profile: str = None, sink=None, verbose: bool = False):
+    """
+    handle on a model kept alive between edits, see ResourcePlanModel.
+    """
+    with solverTelemetry.recording("resource") as telemetry:
+        telemetry.set("incremental", True)
+        return _solve_plans(plan, control, telemetry, pool or RESOURCE_POOL, profile, sink, verbose)
+
+
+def _solve_plans(plan, control, telemetry, pool, profile, sink=None, verbose=False):
+    # Task_Assignment and Resource_Availability only involve the data, an
+    # instance violating them is infeasible
+    if not _feasible_assignment(plan.tasks, plan.ressources, plan.installed, plan.time_req):
+        return []
 
-
-
-def handle(periods, gain, installed, time_req, max_do, holding_cost, max_inventory, store_target, total_work):
-
-
-
-    # PARAMETERS
-    tasks = list(gain.keys())
-    ressources = list(installed.keys())
-
-    
-
-    model = gp.Model('Multi-resource Allocation Problem')
-
-    # Variables
-
-    do = model.addVars(periods, tasks, name="Do") # units of a task to be done in a period
-    store = model.addVars(periods,tasks, ub=max_inventory,name="Store") # units of a task to defer in a period
-    make = model.addVars(periods,tasks, ub=max_do, name="Make") # units of a task done in a period
-
-
-    # Constraints
-
-    # initial balance
-    balance0 = model.addConstrs((do[periods[0],task] == make[periods[0],task] + store[periods[0],task] for task in tasks), name="Initial Balance")
-
-    # balance
-    balance = model.addConstrs((store[periods[periods.index(period) - 1], task] +  do[period,task] == make[period,task] + store[period,task] for task in tasks for period in periods if period != periods[0]), name="Balance")
-
-    # task accomplishment
-    inventory = model.addConstrs((store[periods[-1],task] == store_target for task in tasks), name = "Inventory_Target")
-
-    # ressource capacity
-    capacity = model.addConstrs((gp.quicksum(time_req[ressource][task] * do[period,task] for task in time_req[ressource]) <= total_work * installed[ressource] for ressource in ressources for period in periods), name="Capacity")
-    task_assignment = model.addConstrs((gp.quicksum(time_req[resource][task] * installed[resource] for task in tasks) >= 0.00001 for resource in ressources),name="Task_Assignment")
-
-    # resource availability
-    resource_availability = model.addConstrs(((installed[resource] > 0) if (time_req[resource][task] > 0) else True for task in tasks for resource in ressources), name="Resource_Availability")
-
-    # Objective Function
-    objective = gp.quicksum(gain[task] * make[period,task] - holding_cost * store[period,task] for period in periods for task in tasks)
-    model.setObjective(objective,GRB.MAXIMIZE)
-
-
-
-    model.setParam(GRB.Param.PoolSearchMode,2)
-    model.setParam(GRB.Param.PoolSolutions,1000)
-    model.setParam(GRB.Param.PoolGap,0.10)
-    model.optimize()
+    model = plan.model
+    pool.apply(model)
+    telemetry.set("params", solverProfiles.apply(model, "resource", profile))
+    solveControl.optimize(model, control, telemetry)
 
 
     if model.Status == GRB.INFEASIBLE:
         return []
+    solveControl.check_limit(model)
 
 
     num_solutions = model.SolCount
 
-    rows = periods.copy()
-    columns = tasks.copy()
-
-    solutions = []
-
-    # Retrieve and print all solutions
-    for i in range(num_solutions):
-        model.setParam(GRB.Param.SolutionNumber, i)
-
-        # Create dataframes for each plan
-        tasks_plan = pd.DataFrame(columns=tasks, index=periods, data=0.0)
-        make_plan = pd.DataFrame(columns=tasks, index=periods, data=0.0)
-        inventory_plan = pd.DataFrame(columns=tasks, index=periods, data=0.0)
-
-        # Fill the dataframes with the solution data
-        for period, task in do.keys():
-            if (abs(do[period,task].X) > 1e-6):
-                tasks_plan.loc[period,task] = np.round(do[period,task].X,1)
-        for period, task in make.keys():
-            if (abs(make[period, task].X) > 1e-6):
-                make_plan.loc[period, task] = np.round(make[period, task].X, 1)
-        for period, task in store.keys():
-            if (abs(store[period, task].X) > 1e-6):
-                inventory_plan.loc[period, task] = np.round(store[period, task].X, 1)
-        
-        # Store the solution
-        solutions.append({
-            'objective_value': model.ObjVal,
-            'tasks_plan': tasks_plan,
-            'make_plan': make_plan,
-            'inventory_plan': inventory_plan
-        })
-
-
-    for i,solution in enumerate(solutions):
+    with telemetry.phase("extraction"):
+        # Retrieve every solution in bulk, one read per block and solution.
+        # A linear program only has its optimal solution, read from X
+        attribute = GRB.Attr.Xn if model.IsMIP else GRB.Attr.X
+        objective = GRB.Attr.PoolObjVal if model.IsMIP else GRB.Attr.ObjVal
+        values = np.empty((num_solutions, 3, len(plan.periods), len(plan.tasks)), dtype=np.float32)
+        objectives = np.empty(num_solutions)
+        seen = set()
+        count = 0
+        for i in range(num_solutions):
+            model.setParam(GRB.Param.SolutionNumber, i)
+            for j, block in enumerate((plan.do, plan.make, plan.store)):
+                values[count, j] = block.getAttr(attribute)
+            # members equal at the precision of the plans are the same plan
+            key = (np.round(values[count], DUPLICATE_DECIMALS) + 0.0).tobytes()
+            if key in seen:
+                continue
+            seen.add(key)
+            objectives[count] = model.getAttr(objective)
+            if sink is not None:
+                sink.write(values[count], objectives[count])
+            count += 1
+        telemetry.set("duplicates", num_solutions - count)
+
+    return PlanPool(values[:count], objectives[:count], plan.periods, plan.tasks, verbose,
+                    *solveControl.solve_status(model))
+
+
+def rolling_handle(periods, gain, installed, time_req, max_do, holding_cost, max_inventory, store_target, total_work,
+                   window, overlap=0, control=None, profile=None, workers=None, threads=1, verbose=False):
+    """
+    Rolling-horizon variant of handle for long horizons: windows of ``window``
+    periods are solved in turn, each starting from the inventory left by the
+    periods kept from the previous one. The last ``overlap`` periods of a
+    window only let it see past its end and are solved again by the next
+    window; the last window carries the inventory target. Only one window
+    model exists at a time, whatever the length of the horizon.
+
+    Without inventory (max_inventory 0) the windows do not depend on each
+    other and are solved on ``workers`` processes using ``threads`` Gurobi
+    threads each when ``workers`` is greater than 1.
+
+    Returns a PlanPool holding the plan over all the periods, [] when a window
+    is infeasible. Its status is the first one of a window stopped by a
+    limit, GRB.OPTIMAL when every window is optimal.
+    """
+    if window < 1 or not 0 <= overlap < window:
+        raise Exception("Fenêtre invalide : " + str(window) + " périodes dont " + str(overlap) + " de chevauchement")
+
+    tasks = list(gain.keys())
+    windows = _windows(len(periods), window, overlap)
+    values = np.zeros((3, len(periods), len(tasks)), dtype=np.float32)
+    arguments = (gain, installed, time_req, max_do, holding_cost, max_inventory)
+    status = GRB.OPTIMAL
+
+    independent = not np.any(_bounds(max_inventory, periods, tasks))
+    if independent and workers is not None and workers > 1:
+        with ProcessPoolExecutor(workers, initializer=solveControl.process_env) as executor:
+            futures = {executor.submit(_solve_independent_window, threads, periods[start:end], *arguments,
+                                       store_target if end == len(periods) else None, total_work, profile): (start, kept)
+                       for start, end, kept in windows}
+            for future in as_completed(futures):
+                if control is not None and control.cancelled:
+                    executor.shutdown(cancel_futures=True)
+                    raise solveControl.SolveCancelled()
+                plan, window_status = future.result()
+                if plan is None:
+                    executor.shutdown(cancel_futures=True)
+                    return []
+                start, kept = futures[future]
+                values[:, start:kept] = plan[:, :kept - start]
+                if status == GRB.OPTIMAL:
+                    status = window_status
+    else:
+        for start, end, kept in windows:
+            # the inventory left by the periods kept so far
+            initial_store = values[2, start - 1] if start > 0 else None
+            plan, window_status = _solve_window(periods[start:end], *arguments,
+                                                store_target if end == len(periods) else None, total_work, control,
+                                                profile, initial_store)
+            if plan is None:
+                return []
+            values[:, start:kept] = plan[:, :kept - start]
+            if status == GRB.OPTIMAL:
+                status = window_status
+
+    gain_vector = np.array([gain[task] for task in tasks], dtype=float)
+    objective = float((values[1].astype(float) @ gain_vector).sum() - holding_cost * values[2].astype(float).sum())
+    return PlanPool(values[np.newaxis], np.array([objective]), periods, tasks, verbose, status)
+
+
+def _windows(count, window, overlap):
+    # (start, end, kept) of each window: periods start..end are solved, the
+    # ones before kept are kept, the last window reaches the end
+    windows = []
+    start = 0
+    while start + window < count:
+        windows.append((start, start + window, start + window - overlap))
+        start += window - overlap
+    windows.append((start, count, count))
+    return windows
+
+
+def _solve_window(periods, gain, installed, time_req, max_do, holding_cost, max_inventory, store_target, total_work,
+                  control, profile, initial_store):
+    # (3, periods, tasks) Do, Make and Store values of one window and the
+    # status of its solve, None values when it is infeasible
+    with solverTelemetry.recording("resource") as telemetry:
+        telemetry.set("window", [periods[0], periods[-1]])
+        plans = _handle(periods, gain, installed, time_req, max_do, holding_cost, max_inventory, store_target,
+                        total_work, control, telemetry, OPTIMUM, profile, initial_store)
+    if len(plans) == 0:
+        return None, GRB.INFEASIBLE
+    return plans.values[0], plans.status
+
+
+def _solve_independent_window(threads, periods, gain, installed, time_req, max_do, holding_cost, max_inventory,
+                               store_target, total_work, profile):
+    # _solve_window in a worker process, which has its own control and one
+    # environment for all its windows, which close leaves open
+    control = solveControl.SolveControl(threads=threads, env=solveControl.process_env())
+    try:
+        return _solve_window(periods, gain, installed, time_req, max_do, holding_cost, max_inventory, store_target,
+                             total_work, control, profile, None)
+    finally:
+        control.close()
+
+
+class PlanPool(SolutionPool):
+    """
+    Plans of the solution pool stored in one float32 array shaped
+    (solutions, 3, periods, tasks) holding the Do, Make and Store values.
+    ``pool[i]`` is the dict with the objective value and the three plans as
+    DataFrames, built the first time solution ``i`` is read and printed then
+    when ``verbose``.
+    """
+
+    def __init__(self, values, objectives, periods, tasks, verbose=False, status=GRB.OPTIMAL, gap=None):
+        super().__init__(len(objectives), self._solution, status, gap)
+        self.values = values
+        self.objectives = objectives
+        self.periods = periods
+        self.tasks = tasks
+        self.verbose = verbose
+
+    def _values(self, i):
+        return self.values[i]
+
+    def _solution(self, i):
+        do, make, store = self._values(i)
+        solution = {
+            'objective_value': float(self.objectives[i]),
+            'tasks_plan': _plan(do, self.periods, self.tasks),
+            'make_plan': _plan(make, self.periods, self.tasks),
+            'inventory_plan': _plan(store, self.periods, self.tasks)
+        }
+        if not self.verbose:
+            return solution
+
         print('Solution ', i)
         print('Objective value: ', solution['objective_value'])
         print('tasks plan:')
@@ -105,8 +399,43 @@ def handle(periods, gain, installed, time_req, max_do, holding_cost, max_invento
         print(solution['make_plan'])
         print('Inventory plan:')
         print(solution['inventory_plan'])
-
-    return solutions
+        return solution
+
+
+def _feasible_assignment(tasks, ressources, installed, time_req) -> bool:
+    for resource in ressources:
+        if sum(time_req[resource].get(task, 0) * installed[resource] for task in tasks) < 0.00001:
+            return False
+        if installed[resource] <= 0 and any(time_req[resource].get(task, 0) > 0 for task in tasks):
+            return False
+    return True
+
+
+def _requirement_matrix(tasks, ressources, time_req) -> sp.csr_matrix:
+    # (ressource x task) time required per unit of task
+    position = {task: j for j, task in enumerate(tasks)}
+    rows, columns, data = [], [], []
+    for i, ressource in enumerate(ressources):
+        for task, required in time_req[ressource].items():
+            if task not in position:
+                raise Exception("Tâche inconnue dans les temps de la ressource " + str(ressource) + " : " + str(task))
+            rows.append(i)
+            columns.append(position[task])
+            data.append(required)
+    return sp.csr_matrix((data, (rows, columns)), shape=(len(ressources), len(tasks)))
+
+
+def _bounds(bound, periods, tasks):
+    # a bound common to every (period, task) or a dict keyed by (period, task)
+    if isinstance(bound, dict):
+        return np.array([[bound[period, task] for task in tasks] for period in periods], dtype=float)
+    return bound
+
+
+def _plan(values, periods, tasks) -> pd.DataFrame:
+    values = values.astype(float)
+    values = np.where(np.abs(values) > 1e-6, np.round(values, 1), 0.0)
+    return pd.DataFrame(values, index=periods, columns=tasks)
 
 
 # periods = ["durée" + str(i) for i in range(1,6)]
@@ -0,0 +1,67 @@
+import itertools
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.spatial import cKDTree
+
+
+def load_points(path: str, delimiter: str = ",", header: bool = False) -> np.ndarray:
+    """
+    Read a csv file of points, one ``x, y[, ...]`` row per site or region, as
+    a float array with one row per line.
+    """
+    try:
+        return np.loadtxt(path, delimiter=delimiter, skiprows=1 if header else 0, ndmin=2)
+    except ValueError as e:
+        raise Exception("Fichier " + path + " : " + str(e))
+
+
+def polygon_centroids(polygons) -> np.ndarray:
+    """
+    Centroids of the regions given as polygons, each a (k, 2) sequence of
+    vertices. Degenerate polygons fall back to the mean of their vertices.
+    """
+    centroids = np.empty((len(polygons), 2))
+    for i, polygon in enumerate(polygons):
+        points = np.asarray(polygon, dtype=float)
+        x, y = points[:, 0], points[:, 1]
+        x_next, y_next = np.roll(x, -1), np.roll(y, -1)
+        cross = x * y_next - x_next * y
+        area = cross.sum() / 2
+        if abs(area) < 1e-12:
+            centroids[i] = points.mean(axis=0)
+        else:
+            centroids[i] = ((x + x_next) @ cross / (6 * area), (y + y_next) @ cross / (6 * area))
+    return centroids
+
+
+def coverage_matrix(site_xy, radius, region_xy) -> sp.csr_matrix:
+    """
+    (regions x sites) coverage matrix of sites covering the regions whose
+    centroid lies within ``radius`` (a scalar or one radius per site), the
+    layout of CellTowerCoverageModule.coverage_index. The regions go in a
+    KD-tree queried once per site, the cost grows with the number of covered
+    pairs instead of regions x sites.
+    """
+    site_xy = np.asarray(site_xy, dtype=float).reshape(-1, 2)
+    region_xy = np.asarray(region_xy, dtype=float).reshape(-1, 2)
+    radius = np.broadcast_to(np.asarray(radius, dtype=float), (len(site_xy),))
+    if (radius < 0).any():
+        raise Exception("Le rayon de couverture doit être positif")
+
+    tree = cKDTree(region_xy)
+    covered = tree.query_ball_point(site_xy, radius, workers=-1, return_sorted=False)
+    counts = np.fromiter(map(len, covered), dtype=np.int64, count=len(site_xy))
+    rows = np.fromiter(itertools.chain.from_iterable(covered), dtype=np.int64, count=counts.sum())
+    columns = np.repeat(np.arange(len(site_xy)), counts)
+    return sp.csr_matrix((np.ones(len(rows)), (rows, columns)), shape=(len(region_xy), len(site_xy)))
+
+
+def site_coverage_cost(covering: sp.csr_matrix, costs) -> dict:
+    """
+    ``{site: [covered regions, cost]}`` of cell_tower_problem from a coverage
+    matrix, sites and regions numbered by position.
+    """
+    by_site = sp.csc_matrix(covering)
+    indptr, indices = by_site.indptr, by_site.indices
+    return {j: [set(indices[indptr[j]:indptr[j + 1]].tolist()), float(costs[j])] for j in range(by_site.shape[1])}
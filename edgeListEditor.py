@@ -0,0 +1,113 @@
+import re
+
+from PyQt5 import QtCore
+
+import graphLoader
+from graphLoader import EdgeList
+
+COLUMNS = ["Source", "Cible", "Poids"]
+# separators accepted when pasting rows copied from a spreadsheet or a file
+SEPARATORS = re.compile(r"[\t,;]")
+
+
+class EdgeTableModel(QtCore.QAbstractTableModel):
+    """
+    Sparse (source, target, weight) editor for the shortest path graph.
+
+    The rows are kept in one list per column, so memory grows with the number
+    of edges instead of the square of the number of nodes. The last row is
+    always empty to let the user type a new edge.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.columns = [[""], [""], [""]]
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns[0])
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role != QtCore.Qt.DisplayRole:
+            return None
+        if orientation == QtCore.Qt.Horizontal:
+            return COLUMNS[section]
+        return str(section + 1)
+
+    def flags(self, index):
+        return QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsEditable
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid() or role not in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole):
+            return None
+        return self.columns[index.column()][index.row()]
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        if not index.isValid() or role != QtCore.Qt.EditRole:
+            return False
+        self.columns[index.column()][index.row()] = str(value).strip()
+        self.dataChanged.emit(index, index)
+        if index.row() == self.rowCount() - 1 and value != "":
+            self._append([("", "", "")])
+        return True
+
+    def _append(self, rows):
+        first = self.rowCount()
+        self.beginInsertRows(QtCore.QModelIndex(), first, first + len(rows) - 1)
+        for row in rows:
+            for column, value in zip(self.columns, row):
+                column.append(value)
+        self.endInsertRows()
+
+    def paste_text(self, text: str):
+        """
+        Append the edges of a pasted text block, one ``source target weight``
+        row per line separated by tabs, commas or semicolons.
+        """
+        rows = []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            cells = [cell.strip() for cell in SEPARATORS.split(line)]
+            if len(cells) == 1:
+                cells = line.split()
+            rows.append((cells + ["", "", ""])[:3])
+        if not rows:
+            return
+        # the pasted rows replace the trailing empty row
+        last = self.rowCount() - 1
+        self.beginRemoveRows(QtCore.QModelIndex(), last, last)
+        for column in self.columns:
+            column.pop()
+        self.endRemoveRows()
+        self._append(rows + [("", "", "")])
+
+    def clear(self):
+        self.beginResetModel()
+        self.columns = [[""], [""], [""]]
+        self.endResetModel()
+
+    def edges(self, nodes=None) -> EdgeList:
+        """
+        Validate every row in a single pass and return the compact edge list.
+        ``nodes`` restricts the sources and targets to the declared nodes. A
+        row repeating the source and target of an earlier one is rejected by
+        graphLoader.load_rows, with its line number.
+        """
+        known = set(nodes) if nodes else None
+        rows = []
+        for i, row in enumerate(zip(*self.columns), start=1):
+            if not any(row):
+                rows.append(())
+                continue
+            source, target, weight = row
+            if source == "" or target == "" or weight == "":
+                raise Exception("Ligne " + str(i) + " : source, cible et poids sont obligatoires")
+            if source == target:
+                raise Exception("Ligne " + str(i) + " : la source et la cible sont identiques")
+            if known is not None and (source not in known or target not in known):
+                raise Exception("Ligne " + str(i) + " : noeud inconnu")
+            rows.append(row)
+        return graphLoader.load_rows(rows)
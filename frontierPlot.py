@@ -0,0 +1,58 @@
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+MARGIN = 45
+
+
+class FrontierPlot(QtWidgets.QWidget):
+    """
+    Coverage (%) versus budget curve of coverage_frontier, with the allocated
+    budget marked by a vertical line.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.points = []
+        self.budget = None
+
+    def set_frontier(self, frontier, budget=None):
+        self.points = [(point["budget"], point["coverage_percentage"]) for point in frontier
+                       if point["coverage_percentage"] is not None]
+        self.budget = budget
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self)
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        painter.fillRect(self.rect(), QtCore.Qt.white)
+        width = self.width() - 2 * MARGIN
+        height = self.height() - 2 * MARGIN
+        if not self.points or width <= 0 or height <= 0:
+            return
+        low = min(budget for budget, _ in self.points)
+        high = max(budget for budget, _ in self.points)
+        span = high - low or 1.0
+
+        def position(budget, coverage):
+            return QtCore.QPointF(MARGIN + width * (budget - low) / span,
+                                  MARGIN + height * (1 - coverage / 100))
+
+        # axes
+        painter.setPen(QtGui.QPen(QtCore.Qt.black, 1))
+        painter.drawLine(MARGIN, MARGIN, MARGIN, MARGIN + height)
+        painter.drawLine(MARGIN, MARGIN + height, MARGIN + width, MARGIN + height)
+        painter.drawText(MARGIN, MARGIN - 10, "Couverture (%)")
+        painter.drawText(MARGIN + width - 50, MARGIN + height + 30, "Budget")
+        for coverage in (0, 50, 100):
+            painter.drawText(5, int(position(low, coverage).y()) + 5, str(coverage))
+        painter.drawText(MARGIN, MARGIN + height + 15, str(round(low, 2)))
+        painter.drawText(MARGIN + width - 30, MARGIN + height + 15, str(round(high, 2)))
+
+        if self.budget is not None and low <= self.budget <= high:
+            painter.setPen(QtGui.QPen(QtCore.Qt.red, 1, QtCore.Qt.DashLine))
+            painter.drawLine(position(self.budget, 0), position(self.budget, 100))
+
+        painter.setPen(QtGui.QPen(QtGui.QColor("green"), 2))
+        points = [position(budget, coverage) for budget, coverage in self.points]
+        painter.drawPolyline(QtGui.QPolygonF(points))
+        for point in points:
+            painter.drawEllipse(point, 3, 3)
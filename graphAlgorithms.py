@@ -0,0 +1,231 @@
+import heapq
+from collections import deque
+
+import numpy as np
+
+from graphLoader import EdgeList
+
+INF = float("inf")
+
+
+class NegativeCycleError(Exception):
+    """
+    Raised when the graph contains a negative cycle, ``cycle`` lists its
+    vertices with the first one repeated at the end.
+    """
+
+    def __init__(self, cycle=None):
+        message = "Un Cycle negatif est detecté"
+        if cycle:
+            message += " : " + " -> ".join(str(c) for c in cycle)
+        super().__init__(message)
+        self.cycle = cycle
+
+
+class Adjacency:
+    """
+    Compact forward-star (CSR) representation of a weighted directed graph.
+
+    The nodes are interned to integer ids, the arcs leaving node ``u`` are
+    stored in ``heads[offsets[u]:offsets[u + 1]]`` with their weights in
+    ``weights`` at the same positions.
+    """
+
+    def __init__(self, nodes: list, tails, heads, weights):
+        self.nodes = nodes
+        self.index = {node: i for i, node in enumerate(nodes)}
+        tails = np.asarray(tails, dtype=np.int64)
+        weights = np.asarray(weights, dtype=np.float64)
+        order = np.argsort(tails, kind="stable")
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(tails, minlength=len(nodes))))).tolist()
+        self.heads = np.asarray(heads, dtype=np.int64)[order].tolist()
+        self.weights = weights[order].tolist()
+        self.has_negative_weights = bool((weights < 0).any())
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def arcs(self, u: int):
+        for a in range(self.offsets[u], self.offsets[u + 1]):
+            yield a, self.heads[a], self.weights[a]
+
+    def weight(self, u: int, v: int) -> float:
+        # the cheapest of the parallel arcs, the one a shortest path uses
+        weights = [w for _, head, w in self.arcs(u) if head == v]
+        if not weights:
+            raise KeyError((self.nodes[u], self.nodes[v]))
+        return min(weights)
+
+    def path_cost(self, path: list[int]) -> float:
+        return sum(self.weight(u, v) for u, v in zip(path, path[1:]))
+
+
+def build_adjacency(dist: dict[(str, str), float] | EdgeList) -> Adjacency:
+    """
+    Build the compact adjacency structure of the graph described by ``dist``.
+    """
+    if isinstance(dist, EdgeList):
+        return Adjacency(dist.nodes, dist.tails, dist.heads, dist.weights)
+    index = {}
+    tails, heads, weights = [], [], []
+    for (i, j), w in dist.items():
+        tails.append(index.setdefault(i, len(index)))
+        heads.append(index.setdefault(j, len(index)))
+        weights.append(float(w))
+    return Adjacency(list(index), tails, heads, weights)
+
+
+def _path_to(pred: list[int], source: int, target: int) -> list[int]:
+    path = [target]
+    while path[-1] != source:
+        path.append(pred[path[-1]])
+    path.reverse()
+    return path
+
+
+def dijkstra(adj: Adjacency, source: int, target: int, banned_nodes=(), banned_arcs=()):
+    """
+    Heap-based Dijkstra between ``source`` and ``target``, valid for
+    non-negative weights. Returns ``(cost, path)`` with the path as a list of
+    node ids, or ``(INF, None)`` when the target is not reachable.
+    """
+    dist = [INF] * len(adj)
+    pred = [-1] * len(adj)
+    dist[source] = 0.0
+    heap = [(0.0, source)]
+    while heap:
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        if u == target:
+            return d, _path_to(pred, source, target)
+        for a, v, w in adj.arcs(u):
+            if v in banned_nodes or a in banned_arcs:
+                continue
+            if d + w < dist[v]:
+                dist[v] = d + w
+                pred[v] = u
+                heapq.heappush(heap, (d + w, v))
+    return INF, None
+
+
+def bellman_ford(adj: Adjacency, source: int, target: int, banned_nodes=(), banned_arcs=()):
+    """
+    Queue-based Bellman-Ford (SPFA) between ``source`` and ``target``, valid
+    for negative weights. Returns ``(cost, path)`` like :func:`dijkstra` and
+    raises an exception when a negative cycle is reachable from the source.
+    """
+    n = len(adj)
+    dist = [INF] * n
+    pred = [-1] * n
+    relaxed = [0] * n
+    in_queue = [False] * n
+    dist[source] = 0.0
+    queue = deque([source])
+    in_queue[source] = True
+    while queue:
+        u = queue.popleft()
+        in_queue[u] = False
+        for a, v, w in adj.arcs(u):
+            if v in banned_nodes or a in banned_arcs:
+                continue
+            if dist[u] + w < dist[v]:
+                dist[v] = dist[u] + w
+                pred[v] = u
+                relaxed[v] += 1
+                if relaxed[v] >= n:
+                    raise NegativeCycleError(_cycle_from(adj, pred, v))
+                if not in_queue[v]:
+                    in_queue[v] = True
+                    queue.append(v)
+    if dist[target] == INF:
+        return INF, None
+    return dist[target], _path_to(pred, source, target)
+
+
+def _cycle_from(adj: Adjacency, pred: list[int], v: int):
+    """
+    Follow the predecessors of ``v`` and return the cycle they close, as node
+    names, or None if the chain ends without looping.
+    """
+    position = {}
+    chain = []
+    while v != -1 and v not in position:
+        position[v] = len(chain)
+        chain.append(v)
+        v = pred[v]
+    if v == -1:
+        return None
+    cycle = chain[position[v]:] + [v]
+    cycle.reverse()
+    return [adj.nodes[u] for u in cycle]
+
+
+def find_negative_cycle(adj: Adjacency):
+    """
+    Queue-based Bellman-Ford from a virtual source linked to every node.
+
+    Returns the vertices of a negative cycle (first vertex repeated at the
+    end) or None. Stops as soon as the queue is empty, O(V.E) in the worst
+    case.
+    """
+    n = len(adj)
+    dist = [0.0] * n
+    pred = [-1] * n
+    relaxed = [0] * n
+    in_queue = [True] * n
+    queue = deque(range(n))
+    while queue:
+        u = queue.popleft()
+        in_queue[u] = False
+        for _, v, w in adj.arcs(u):
+            if dist[u] + w < dist[v]:
+                dist[v] = dist[u] + w
+                pred[v] = u
+                relaxed[v] += 1
+                if relaxed[v] >= n:
+                    cycle = _cycle_from(adj, pred, v)
+                    if cycle is not None:
+                        return cycle
+                if not in_queue[v]:
+                    in_queue[v] = True
+                    queue.append(v)
+    return None
+
+
+def yen_k_shortest_paths(adj: Adjacency, source: int, target: int, k: int, search=dijkstra):
+    """
+    Yen's algorithm: the ``k`` shortest loopless paths between ``source`` and
+    ``target`` in increasing cost order, as a list of ``(cost, path)``.
+    ``search`` is the single-pair algorithm used for the spur paths.
+    """
+    cost, path = search(adj, source, target)
+    if path is None:
+        return []
+    found = [(cost, path)]
+    candidates = []
+    seen = {tuple(path)}
+    while len(found) < k:
+        _, previous = found[-1]
+        for i in range(len(previous) - 1):
+            spur = previous[i]
+            root = previous[:i + 1]
+            banned_arcs = set()
+            for _, p in found:
+                if p[:i + 1] == root:
+                    for a, v, _ in adj.arcs(spur):
+                        if v == p[i + 1]:
+                            banned_arcs.add(a)
+            banned_nodes = set(root[:-1])
+            spur_cost, spur_path = search(adj, spur, target, banned_nodes, banned_arcs)
+            if spur_path is None:
+                continue
+            candidate = root[:-1] + spur_path
+            if tuple(candidate) in seen:
+                continue
+            seen.add(tuple(candidate))
+            heapq.heappush(candidates, (adj.path_cost(root) + spur_cost, candidate))
+        if not candidates:
+            break
+        found.append(heapq.heappop(candidates))
+    return found
@@ -1,3 +1,7 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
 from pyvis.network import Network
 
 class Edge:
@@ -16,13 +20,42 @@ class Node:
     def __str__(self):
         return f"name: {self.name}, color: {self.color}"
 
-def display_graph(nodes: list[Node],edges: list[Edge]):
+def _network(nodes: list[Node],edges: list[Edge]):
     nt = Network(notebook=True,directed=True)
     for node in nodes: 
         nt.add_node(node.name,color=node.color)
     for edge in edges:  
         # print(edge)
         nt.add_edge(edge.src,edge.dest,color=edge.color,label=str(edge.weight))
-    nt.show("shortest-path.html")
+    return nt
+
+# Background rendering, one HTML file per (graph, solution) key
+_renderer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="graph-render")
+_rendered = {}
+_rendered_lock = threading.Lock()
+
+def render_async(key: str, build) -> Future:
+    """
+    Render the graph returned by ``build()`` (a ``(nodes, edges)`` pair) to
+    ``shortest-path-<key>.html`` on a background thread.
 
+    The future resolves to the file path. A key already rendered, in this run
+    or a previous one, is not rendered again.
+    """
+    file_name = "shortest-path-" + key[:16] + ".html"
+    with _rendered_lock:
+        future = _rendered.get(key)
+        if future is not None and not (future.done() and future.exception()):
+            return future
+        if os.path.exists(file_name):
+            future = Future()
+            future.set_result(file_name)
+        else:
+            future = _renderer.submit(_render, build, file_name)
+        _rendered[key] = future
+        return future
 
+def _render(build, file_name):
+    nodes, edges = build()
+    _network(nodes, edges).write_html(file_name)
+    return file_name
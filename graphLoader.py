@@ -0,0 +1,144 @@
+import csv
+from array import array
+
+import numpy as np
+
+
+class EdgeList:
+    """
+    Compact graph accepted by ``shortest_path`` in place of a ``dist``
+    dictionary: the node names are interned to ids, the arcs are stored as
+    parallel arrays of tails, heads and weights.
+    """
+
+    def __init__(self, nodes: list, tails: np.ndarray, heads: np.ndarray, weights: np.ndarray):
+        self.nodes = nodes
+        self.index = {node: i for i, node in enumerate(nodes)}
+        self.tails = tails
+        self.heads = heads
+        self.weights = weights
+
+    @classmethod
+    def from_dict(cls, dist: dict[(str, str), float]) -> "EdgeList":
+        builder = _Builder()
+        for (i, j), w in dist.items():
+            builder.add(i, j, w)
+        return builder.build()
+
+    def __len__(self):
+        return len(self.weights)
+
+    def keys(self):
+        nodes = self.nodes
+        return ((nodes[i], nodes[j]) for i, j in zip(self.tails.tolist(), self.heads.tolist()))
+
+    def values(self):
+        return self.weights.tolist()
+
+    def items(self):
+        return zip(self.keys(), self.values())
+
+
+class _Builder:
+    """
+    Accumulate arcs in typed arrays while interning the node names, without
+    building a tuple key or a Python float per arc.
+    """
+
+    def __init__(self):
+        self.index = {}
+        self.tails = array('q')
+        self.heads = array('q')
+        self.weights = array('d')
+
+    def _intern(self, node) -> int:
+        node_id = self.index.get(node)
+        if node_id is None:
+            node_id = self.index[node] = len(self.index)
+        return node_id
+
+    def add(self, tail, head, weight):
+        self.tails.append(self._intern(tail))
+        self.heads.append(self._intern(head))
+        self.weights.append(weight)
+
+    def build(self) -> EdgeList:
+        return EdgeList(list(self.index),
+                        np.frombuffer(self.tails, dtype=np.int64),
+                        np.frombuffer(self.heads, dtype=np.int64),
+                        np.frombuffer(self.weights, dtype=np.float64))
+
+
+def _check_duplicates(tails: np.ndarray, heads: np.ndarray, lines=None):
+    """
+    Raise on the first (tail, head) pair given twice, a graph has one arc
+    per pair. ``lines`` gives the line of each arc for the message.
+    """
+    order = np.lexsort((heads, tails))
+    repeated = np.flatnonzero((tails[order][1:] == tails[order][:-1]) & (heads[order][1:] == heads[order][:-1]))
+    if len(repeated) == 0:
+        return
+    first, second = sorted(order[repeated[0]:repeated[0] + 2].tolist())
+    if lines is None:
+        raise Exception("Arc répété aux lignes " + str(first) + " et " + str(second) + " du tableau")
+    raise Exception("Ligne " + str(lines[second]) + " : arc déjà donné ligne " + str(lines[first]))
+
+
+def load_rows(rows, first_line: int = 1) -> EdgeList:
+    """
+    Build an edge list from ``(source, target, weight)`` rows in one pass,
+    the weights may be given as text. Empty rows are skipped, a repeated
+    (source, target) pair is an error.
+    """
+    builder = _Builder()
+    lines = array('q')
+    for line, row in enumerate(rows, start=first_line):
+        if not row:
+            continue
+        if len(row) != 3:
+            raise Exception("Ligne " + str(line) + " : 3 colonnes attendues (source, cible, poids)")
+        try:
+            weight = float(row[2])
+        except ValueError:
+            raise Exception("Ligne " + str(line) + " : le poids doit etre un nombre")
+        builder.add(row[0].strip(), row[1].strip(), weight)
+        lines.append(line)
+    edges = builder.build()
+    _check_duplicates(edges.tails, edges.heads, lines)
+    return edges
+
+
+def load_csv(path: str, delimiter: str = ",", header: bool = False) -> EdgeList:
+    """
+    Stream a ``source,target,weight`` edge list from a text file.
+    """
+    with open(path, newline="") as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        if header:
+            next(reader, None)
+        return load_rows(reader, first_line=2 if header else 1)
+
+
+def load_tsv(path: str, header: bool = False) -> EdgeList:
+    return load_csv(path, delimiter="\t", header=header)
+
+
+def load_npy(path: str, nodes: list = None, mmap: bool = True) -> EdgeList:
+    """
+    Load an edge list saved with ``numpy.save`` as an (E, 3) array of
+    (tail id, head id, weight), memory-mapped by default. ``nodes`` gives the
+    names of the ids, the ids themselves are used when it is omitted.
+    """
+    data = np.load(path, mmap_mode="r" if mmap else None)
+    if data.ndim != 2 or data.shape[1] != 3:
+        raise Exception("Le tableau doit avoir la forme (E, 3)")
+    tails = data[:, 0].astype(np.int64)
+    heads = data[:, 1].astype(np.int64)
+    weights = data[:, 2].astype(np.float64)
+    if nodes is None:
+        n = int(max(tails.max(initial=-1), heads.max(initial=-1))) + 1
+        nodes = list(range(n))
+    elif len(tails) and max(tails.max(), heads.max()) >= len(nodes):
+        raise Exception("Un identifiant de noeud depasse la liste des noeuds")
+    _check_duplicates(tails, heads)
+    return EdgeList(list(nodes), tails, heads, weights)
@@ -0,0 +1,99 @@
+import json
+import os
+
+import numpy as np
+
+from RessourceModule import PlanPool
+
+# solutions per .npz chunk
+CHUNK_SIZE = 100
+INDEX = "index.json"
+
+
+class PlanWriter:
+    """
+    Writes resource plans to the directory ``path`` as they are extracted:
+    compressed .npz chunks of ``chunk_size`` solutions holding the float32
+    (solutions, 3, periods, tasks) Do, Make and Store values, and index.json
+    giving the periods, tasks, objective values and the solutions of every
+    chunk. The index is rewritten with each chunk, an interrupted run leaves
+    the chunks written so far readable. ``with PlanWriter(...) as sink:``
+    writes the last chunk when the block ends.
+    """
+
+    def __init__(self, path, periods, tasks, chunk_size: int = CHUNK_SIZE):
+        if chunk_size < 1:
+            raise Exception("La taille des blocs doit être au moins 1")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.periods = list(periods)
+        self.tasks = list(tasks)
+        self.chunk_size = chunk_size
+        self.objectives = []
+        self.chunks = []
+        self._buffer = np.empty((chunk_size, 3, len(self.periods), len(self.tasks)), dtype=np.float32)
+        self._buffered = 0
+
+    def write(self, values, objective: float):
+        """
+        Adds the (3, periods, tasks) values of one solution.
+        """
+        self._buffer[self._buffered] = values
+        self.objectives.append(float(objective))
+        self._buffered += 1
+        if self._buffered == self.chunk_size:
+            self.flush()
+
+    def write_pool(self, plans: PlanPool):
+        for values, objective in zip(plans.values, plans.objectives):
+            self.write(values, objective)
+
+    def flush(self):
+        if self._buffered == 0:
+            return
+        name = "chunk_%05d.npz" % len(self.chunks)
+        np.savez_compressed(os.path.join(self.path, name), values=self._buffer[:self._buffered])
+        self.chunks.append({"file": name, "first": len(self.objectives) - self._buffered, "count": self._buffered})
+        self._buffered = 0
+        with open(os.path.join(self.path, INDEX), "w") as f:
+            json.dump({
+                "periods": self.periods,
+                "tasks": self.tasks,
+                "objectives": self.objectives,
+                "chunks": self.chunks,
+            }, f)
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PlanArchive(PlanPool):
+    """
+    Plans written by a PlanWriter, read back without solving again. Only the
+    chunk holding the solution being read is loaded.
+    """
+
+    def __init__(self, path, verbose=False):
+        with open(os.path.join(path, INDEX)) as f:
+            index = json.load(f)
+        # the status of the solve is not archived
+        super().__init__(None, np.array(index["objectives"]), index["periods"], index["tasks"], verbose, None)
+        self.path = path
+        self.chunks = index["chunks"]
+        self._firsts = [chunk["first"] for chunk in self.chunks]
+        self._loaded = None
+        self._chunk = None
+
+    def _values(self, i):
+        k = int(np.searchsorted(self._firsts, i, side="right")) - 1
+        if self._loaded != k:
+            with np.load(os.path.join(self.path, self.chunks[k]["file"])) as data:
+                self._chunk = data["values"]
+            self._loaded = k
+        return self._chunk[i - self._firsts[k]]
@@ -3,8 +3,11 @@ import webbrowser
 from PyQt5 import QtWidgets ,QtCore
 
 class HTMLViewer(QtWidgets.QMainWindow):
-    def __init__(self):
+    def __init__(self, result):
         super().__init__()
+        # ShortestPathResult rendered on demand
+        self.result = result
+        self.future = None
 
         self.setWindowTitle("HTML Viewer")
         self.setGeometry(100, 100, 200, 100)
@@ -19,14 +22,39 @@ class HTMLViewer(QtWidgets.QMainWindow):
         self.button.clicked.connect(self.open_html_file)
         self.layout.addWidget(self.button)
 
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.open_rendered_file)
+
     def open_html_file(self):
-        file_name = "shortest-path.html"
+        self.future = self.result.render()
+        self.button.setEnabled(False)
+        self.timer.start(100)
+
+    def open_rendered_file(self):
+        if not self.future.done():
+            return
+        self.timer.stop()
+        self.button.setEnabled(True)
+        try:
+            file_name = self.future.result()
+        except Exception as e:
+            msg = QtWidgets.QMessageBox()
+            msg.setIcon(QtWidgets.QMessageBox.Warning)
+            msg.setText("Error")
+            msg.setInformativeText(e.__str__())
+            msg.setWindowTitle("Error")
+            msg.exec_()
+            return
+        self.open_file(file_name)
+
+    def open_file(self, file_name):
         file_path = QtCore.QDir.current().filePath(file_name)
         webbrowser.open(file_path)
 
 
 if __name__ == "__main__":
     app = QtWidgets.QApplication(sys.argv)
-    viewer = HTMLViewer()
+    from shortestPathModel import shortest_path
+    viewer = HTMLViewer(shortest_path("A", "C", {("A", "B"): 1, ("B", "C"): 2, ("A", "C"): 5}, backend="dijkstra"))
     viewer.show()
     sys.exit(app.exec_())
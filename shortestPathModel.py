@@ -1,5 +1,31 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 from gurobipy import *
+import numpy as np
+import scipy.sparse as sp
+
+import graphAlgorithms
 import graphDisplayer 
+import solveControl
+import solverProfiles
+import solverTelemetry
+from graphLoader import EdgeList
+from solutionPool import PoolOptions
+
+BACKENDS = ("gurobi", "dijkstra", "bellman_ford", "auto")
+POOL_SOLUTIONS = 5
+POOL_GAP = 0.001
+# pool of shortest_path when none is given
+SHORTEST_PATH_POOL = PoolOptions(POOL_SOLUTIONS, 2, POOL_GAP)
+# an arc belongs to a solution when its (integer) flow is above this value
+ARC_TOLERANCE = 0.5
+# rough memory footprint of a Gurobi model, used by the model cache
+BYTES_PER_VAR = 200
+BYTES_PER_CONSTR = 200
+BYTES_PER_NONZERO = 24
 
 """
 A method to find the shortest path between two nodes in a graph.
@@ -11,72 +37,156 @@ start : str
     The starting node.
 end : str
     The ending node.
-dist : dict
-    A dictionary containing the distances between the nodes.
+dist : dict or EdgeList
+    A dictionary containing the distances between the nodes, or the compact
+    edge list returned by the ``graphLoader`` functions.
+backend : str
+    "gurobi" solves the integer program, "dijkstra" and "bellman_ford" use
+    the combinatorial algorithms with Yen's k-shortest-paths for the
+    alternative paths, "auto" picks Dijkstra unless a weight is negative.
+use_cache : bool
+    Reuse the Gurobi model of the graph kept in ``MODEL_CACHE``, False to
+    build a new model for this query only.
+control : SolveControl
+    Cancellation, progress reports and thread limit of the Gurobi solve.
+render : bool
+    Start rendering the HTML graph in the background as soon as the path is
+    found. By default the graph is only rendered when ``result.render()`` is
+    called.
+pool : PoolOptions
+    Number of alternative paths searched and their gap to the shortest one,
+    ``SHORTEST_PATH_POOL`` by default, ``solutionPool.OPTIMUM`` for the
+    shortest path only. The paths are extracted before the cached model is
+    released, so they are not read lazily.
+profile : str
+    Parameter profile of the Gurobi solve, see ``solverProfiles.PROFILES``.
 
 Returns
 -------
-float
-    The cost of the shortest path.
-list
-    List of the shortest paths.
+ShortestPathResult
+    A ``(cost, paths)`` tuple: the cost of the shortest path and the list of
+    the shortest paths.
 
 
 """
-def shortest_path(start:str,end:str,dist:dict[(str,str),float]):
-    if start==end:
-        raise Exception("Le noeud de depart est le meme que le noeud d'arrivee")
-    # Create a new model
-    shortest_path_model=Model("Shortest Path Model") 
-    # shortest_path_model.params.LogToConsole = 0
-    shortest_path_model.params.DualReductions  = 0
-    shortest_path_model.params.PoolSolutions = 5
-    shortest_path_model.params.PoolSearchMode = 2
-    shortest_path_model.params.PoolGap = 0.001
-    
-    
-    
-    vertices = { i for i,_ in dist.keys()}.union({ j for _,j in dist.keys()})
-    if start not in vertices:
-        raise Exception("Le noeud de départ n'existe pas")
-    if end not in vertices:
-        raise Exception("Le noeud de fin n'existe pas")
-    
-    # Create variables
-    vars = shortest_path_model.addVars(dist.keys(), obj=dist, vtype=GRB.INTEGER, name='x',lb=0)
-    
-    # Set objective
-    shortest_path_model.setObjective(quicksum(vars[i,j]*dist[i,j] for i,j in dist.keys()), GRB.MINIMIZE)
+def shortest_path(start:str,end:str,dist:dict[(str,str),float]|EdgeList,backend:str="gurobi",use_cache:bool=True,render:bool=False,control=None,pool:PoolOptions=None,profile:str=None):
+    if backend not in BACKENDS:
+        raise Exception("Backend inconnu : " + str(backend))
+    pool = pool or SHORTEST_PATH_POOL
 
-    # Add constraints
-    shortest_path_model.addConstr(vars.sum(start, '*')== 1,'Edges out of start')
-    shortest_path_model.addConstr(vars.sum('*', end)  == 1, 'Edges into end')
-    shortest_path_model.addConstrs(vars.sum('*', c) == vars.sum(c, '*') for c in vertices if c != start and c != end)
+    with solverTelemetry.recording("shortest_path") as telemetry:
+        telemetry.set("backend", backend)
+        with telemetry.phase("check"):
+            vertices = _vertices(dist)
+            _check_pair(start, end, vertices)
+            check_negative_cycle(dist)
 
-    # Optimize model
-    shortest_path_model.optimize()
-    print("le nombre de solution est : ",shortest_path_model.SolCount)
-    print("le status de solution est : ",shortest_path_model.status)
-    
-    # Checking the status of the model
-    if(shortest_path_model.status == GRB.OPTIMAL):
-        print("Une solution optimale est trouvée")
-    elif(shortest_path_model.status == GRB.INFEASIBLE):
+        if backend == "gurobi":
+            result = _shortest_path_gurobi(start, end, dist, vertices, MODEL_CACHE if use_cache else None, control,
+                                           telemetry, pool, profile)
+        else:
+            result = _shortest_path_combinatorial(start, end, dist, vertices, backend, telemetry, pool)
+    if render:
+        result.render()
+    return result
+
+
+class ShortestPathResult(tuple):
+    """
+    ``(cost, paths)`` returned by :func:`shortest_path`, which also keeps what
+    is needed to draw the graph later with :meth:`render`.
+    """
+
+    def __new__(cls, cost, paths, start, end, dist, vertices, selected, status=GRB.OPTIMAL, gap=None):
+        result = super().__new__(cls, (cost, paths))
+        # status and gap of the solve, see solveControl.solve_status
+        result.status = status
+        result.gap = gap
+        result.start = start
+        result.end = end
+        result.dist = dist
+        result.vertices = vertices
+        result.selected = frozenset(selected)
+        return result
+
+    def __getnewargs__(self):
+        # pickle and copy rebuild the tuple through __new__
+        return (self.cost, self.paths, self.start, self.end, self.dist, self.vertices, self.selected, self.status, self.gap)
+
+    @property
+    def cost(self):
+        return self[0]
+
+    @property
+    def paths(self):
+        return self[1]
+
+    def render_key(self) -> str:
+        digest = hashlib.sha256(graph_key(self.dist).encode())
+        digest.update(repr((self.start, self.end, sorted(self.selected))).encode())
+        return digest.hexdigest()
+
+    def render(self):
+        """
+        Render the graph with the shortest path in red on a background thread.
+        Returns a future of the HTML file path, cached per graph and solution.
+        """
+        return graphDisplayer.render_async(
+            self.render_key(),
+            lambda: _graph_elements(self.start, self.end, self.dist, self.vertices, self.selected))
+
+
+def _shortest_path_combinatorial(start, end, dist, vertices, backend, telemetry, pool):
+    with telemetry.phase("build"):
+        adj = graphAlgorithms.build_adjacency(dist)
+    if backend == "auto":
+        backend = "bellman_ford" if adj.has_negative_weights else "dijkstra"
+        telemetry.set("backend", backend)
+    search = graphAlgorithms.dijkstra if backend == "dijkstra" else graphAlgorithms.bellman_ford
+    source, target = adj.index[start], adj.index[end]
+    with telemetry.phase("solve"):
+        found = graphAlgorithms.yen_k_shortest_paths(adj, source, target, pool.size, search)
+    if not found:
         raise Exception("Il n'existe pas de chemin entre les deux noeud")
-    elif shortest_path_model.status in [GRB.INF_OR_UNBD, GRB.INFINITY, GRB.UNBOUNDED]:
-        raise Exception("Un Cycle negatif est detecté")
-    else:
-        raise Exception("Le problème n'est pas résolu",shortest_path_model.status)
-    # Building the graph 
+    best = found[0][0]
+    paths = [[adj.nodes[v] for v in path] for cost, path in found
+             if pool.gap is None or cost - best <= pool.gap * abs(best)]
+
+    selected = set(zip(paths[0], paths[0][1:]))
+    return ShortestPathResult(best, paths, start, end, dist, vertices, selected)
+
+
+def check_negative_cycle(dist:dict[(str,str),float]):
+    """
+    Raise a NegativeCycleError naming the cycle when the graph contains a
+    negative cycle, which would make the flow model unbounded. Graphs without
+    negative weights skip the check.
+    """
+    if isinstance(dist, EdgeList):
+        if (dist.weights >= 0).all():
+            return
+    elif all(w >= 0 for w in dist.values()):
+        return
+    cycle = graphAlgorithms.find_negative_cycle(graphAlgorithms.build_adjacency(dist))
+    if cycle is not None:
+        raise graphAlgorithms.NegativeCycleError(cycle)
+
+
+def _vertices(dist):
+    if isinstance(dist, EdgeList):
+        return dist.index
+    return { i for i,_ in dist.keys()}.union({ j for _,j in dist.keys()})
+
+
+def _graph_elements(start, end, dist, vertices, selected):
     edges = []
-    for var in shortest_path_model.getVars():
-        nameWithoutX = var.varName[2:len(var.varName)-1]
+    for (i, j), weight in dist.items():
         edge = graphDisplayer.Edge()
-        edge.src, edge.dest = list(nameWithoutX.split(','))
-        edge.weight=dist[edge.src,edge.dest]
-        edge.color = 'red' if var.x == 1 else 'blue'
+        edge.src, edge.dest = i, j
+        edge.weight = weight
+        edge.color = 'red' if (i, j) in selected else 'blue'
         edges.append(edge)
-        
+
     nodes = []
     for c in vertices:
         node = graphDisplayer.Node()
@@ -88,29 +198,382 @@ def shortest_path(start:str,end:str,dist:dict[(str,str),float]):
         else:
             node.color = 'blue'
         nodes.append(node)
+    return nodes, edges
+
+
+def _walk_selected_arcs(start, end, selected):
+    """
+    Walk the arcs selected by a solution from ``start`` to ``end``.
+
+    Returns the path and the cycles made of the selected arcs that are not on
+    it. Every arc is followed at most once, so a solution that does not reach
+    ``end`` raises an exception instead of looping.
+    """
+    successors = {}
+    for i, j in selected:
+        successors.setdefault(i, []).append(j)
+
+    path = [start]
+    position = {start: 0}
+    cycles = []
+    current = start
+    for _ in range(len(selected)):
+        if current == end:
+            break
+        if not successors.get(current):
+            break
+        current = successors[current].pop()
+        if current in position:
+            # loop attached to the path, cut it out
+            loop = path[position[current]:] + [current]
+            for node in loop[1:-1]:
+                del position[node]
+            del path[position[current] + 1:]
+            cycles.append(loop)
+        else:
+            position[current] = len(path)
+            path.append(current)
+    if current != end:
+        raise Exception("La solution ne relie pas le noeud de depart au noeud d'arrivee")
+
+    # the remaining arcs form the detached sub-cycles
+    for node in list(successors):
+        while successors[node]:
+            cycle = [node]
+            current = successors[node].pop()
+            while current != node and successors.get(current):
+                cycle.append(current)
+                current = successors[current].pop()
+            cycle.append(current)
+            cycles.append(cycle)
+    return path, cycles
+
+
+class FlowModel:
+    """
+    Flow formulation of the shortest path problem on one graph.
+
+    The variables and the flow conservation constraints (out - in) of every
+    vertex are built once, a query only moves the +1/-1 right-hand sides of
+    its start and end vertices.
+    """
+
+    def __init__(self, dist, vertices, vtype=GRB.INTEGER):
+        self.model = Model("Shortest Path Model")
+        self.model.params.DualReductions = 0
+        self.model.ModelSense = GRB.MINIMIZE
+        if isinstance(dist, EdgeList):
+            self._build_from_arrays(dist, vtype)
+        else:
+            x = self.model.addVars(dist.keys(), obj=dist, vtype=vtype, name='x', lb=0)
+            self.balance = self.model.addConstrs(
+                (x.sum(c, '*') - x.sum('*', c) == 0 for c in vertices), name='Balance')
+            self.arcs = list(x.keys())
+            self.arc_vars = list(x.values())
+        self.endpoints = None
+        self.lock = threading.Lock()
+
+    def _build_from_arrays(self, edges, vtype):
+        # node-arc incidence matrix, +1 on the tail and -1 on the head
+        n, m = len(edges.nodes), len(edges)
+        arcs = np.arange(m)
+        incidence = sp.csr_matrix(
+            (np.concatenate([np.ones(m), -np.ones(m)]),
+             (np.concatenate([edges.tails, edges.heads]), np.concatenate([arcs, arcs]))),
+            shape=(n, m))
+        x = self.model.addMVar(m, obj=edges.weights, vtype=vtype, name='x', lb=0)
+        constrs = self.model.addMConstr(incidence, x, '=', np.zeros(n), name='Balance').tolist()
+        self.balance = dict(zip(edges.nodes, constrs))
+        self.arcs = edges
+        self.arc_vars = x.tolist()
+
+    def set_endpoints(self, start, end):
+        if self.endpoints is not None:
+            for c in self.endpoints:
+                self.balance[c].RHS = 0
+        self.balance[start].RHS = 1
+        self.balance[end].RHS = -1
+        self.endpoints = (start, end)
+
+    def check_status(self):
+        # a solve stopped by a limit with a path found is accepted
+        status = self.model.status
+        if status == GRB.INFEASIBLE:
+            raise Exception("Il n'existe pas de chemin entre les deux noeud")
+        elif status in [GRB.INF_OR_UNBD, GRB.INFINITY, GRB.UNBOUNDED]:
+            raise graphAlgorithms.NegativeCycleError()
+        elif status in solveControl.LIMITS and self.model.SolCount > 0:
+            return
+        elif status != GRB.OPTIMAL:
+            raise Exception("Le problème n'est pas résolu", status)
+
+    def selected_arcs(self, attr=GRB.Attr.X):
+        values = self.model.getAttr(attr, self.arc_vars)
+        if isinstance(self.arcs, EdgeList):
+            edges = self.arcs
+            selected = np.flatnonzero(np.asarray(values) > ARC_TOLERANCE)
+            return [(edges.nodes[edges.tails[a]], edges.nodes[edges.heads[a]]) for a in selected]
+        return [arc for arc, value in zip(self.arcs, values) if value > ARC_TOLERANCE]
+
+    def memory(self):
+        self.model.update()
+        return (BYTES_PER_VAR * self.model.NumVars + BYTES_PER_CONSTR * self.model.NumConstrs
+                + BYTES_PER_NONZERO * self.model.NumNZs)
+
+    def dispose(self):
+        with self.lock:
+            self.model.dispose()
+
+
+def graph_key(dist:dict[(str,str),float]) -> str:
+    """
+    Canonical hash of a graph, independent of the insertion order of ``dist``.
+    """
+    digest = hashlib.sha256()
+    if isinstance(dist, EdgeList):
+        order = np.lexsort((dist.heads, dist.tails))
+        digest.update(repr(dist.nodes).encode())
+        for column in (dist.tails, dist.heads, dist.weights):
+            digest.update(np.ascontiguousarray(column[order]).tobytes())
+        return digest.hexdigest()
+    for (i, j), w in sorted(dist.items()):
+        digest.update(repr((i, j, float(w))).encode())
+    return digest.hexdigest()
+
+
+class ModelCache:
+    """
+    LRU cache of the flow models built by :func:`shortest_path`, keyed by
+    :func:`graph_key`. A repeated query on a known graph only rewrites the
+    endpoint right-hand sides. A model handed out by :meth:`lookup` is pinned
+    until :meth:`release`, an evicted model is disposed once no query uses it.
+    """
+
+    def __init__(self, max_size:int=8, max_memory:int=512 * 2**20):
+        self.max_size = max_size
+        self.max_memory = max_memory
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._memory = 0
+        # queries using each model handed out, and the evicted models some
+        # query still uses
+        self._users = {}
+        self._retired = set()
+        self._lock = threading.Lock()
+
+    def lookup(self, dist, vertices):
+        """
+        Return ``(flow, owned)``: the cached flow model of the graph, or a new
+        one. ``owned`` is True when the model did not fit in the cache and the
+        caller must dispose it, otherwise the caller must :meth:`release` it.
+        """
+        key = graph_key(dist)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                flow = self._entries[key][0]
+                self._users[flow] += 1
+                return flow, False
+            self.misses += 1
+
+        flow = FlowModel(dist, vertices)
+        size = flow.memory()
+        if size > self.max_memory or self.max_size <= 0:
+            return flow, True
+        with self._lock:
+            if key in self._entries:
+                # built concurrently by another query
+                return flow, True
+            self._entries[key] = (flow, size)
+            self._users[flow] = 1
+            self._memory += size
+            evicted = self._evict()
+        # outside the cache lock, the models evicted here are not in use
+        for model in evicted:
+            model.dispose()
+        return flow, False
+
+    def release(self, flow):
+        """
+        End of the query using ``flow``, returned by :meth:`lookup`.
+        """
+        with self._lock:
+            self._users[flow] -= 1
+            if self._users[flow] > 0:
+                return
+            if flow not in self._retired:
+                return
+            del self._users[flow]
+            self._retired.discard(flow)
+        flow.dispose()
+
+    def _evict(self):
+        # the evicted models to dispose, the ones in use are disposed by the
+        # last release
+        evicted = []
+        while len(self._entries) > self.max_size or self._memory > self.max_memory:
+            _, (flow, size) = self._entries.popitem(last=False)
+            self._memory -= size
+            self.evictions += 1
+            if self._users[flow] > 0:
+                self._retired.add(flow)
+            else:
+                del self._users[flow]
+                evicted.append(flow)
+        return evicted
+
+    def clear(self):
+        with self._lock:
+            evicted = []
+            while self._entries:
+                _, (flow, _) = self._entries.popitem()
+                if self._users[flow] > 0:
+                    self._retired.add(flow)
+                else:
+                    del self._users[flow]
+                    evicted.append(flow)
+            self._memory = 0
+        for flow in evicted:
+            flow.dispose()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "memory": self._memory,
+            }
+
+
+MODEL_CACHE = ModelCache()
+
+
+def _shortest_path_gurobi(start, end, dist, vertices, cache, control, telemetry, pool, profile):
+    # Create a new model, or reuse the one of this graph
+    with telemetry.phase("build"):
+        if cache is None:
+            flow, owned = FlowModel(dist, vertices), True
+        else:
+            hits = cache.hits
+            flow, owned = cache.lookup(dist, vertices)
+            telemetry.set("cache_hit", cache.hits > hits)
+    try:
+        with flow.lock:
+            return _solve_flow(flow, start, end, dist, vertices, control, telemetry, pool, profile)
+    finally:
+        if owned:
+            flow.dispose()
+        else:
+            cache.release(flow)
+
+
+def _solve_flow(flow, start, end, dist, vertices, control, telemetry, pool, profile):
+    shortest_path_model = flow.model
+    # shortest_path_model.params.LogToConsole = 0
+    pool.apply(shortest_path_model)
+    telemetry.set("params", solverProfiles.apply(shortest_path_model, "shortest_path", profile))
+    flow.set_endpoints(start, end)
+
+    # Optimize model
+    solveControl.optimize(shortest_path_model, control, telemetry)
+    print("le nombre de solution est : ",shortest_path_model.SolCount)
+    print("le status de solution est : ",shortest_path_model.status)
     
-    # Display the graph
-    graphDisplayer.display_graph(nodes, edges)
+    # Checking the status of the model
+    flow.check_status()
+    if shortest_path_model.status == GRB.OPTIMAL:
+        print("Une solution optimale est trouvée")
+    with telemetry.phase("extraction"):
+        # Arcs of the optimal solution, drawn in red by the graph rendering
+        selected = flow.selected_arcs()
     
-    # Building the path
-    paths = []
-    mapperPairToIndex = {pair:i for i,pair in enumerate(dist.keys())}
-    numberOfSolutions = shortest_path_model.SolCount
-    for i in range(numberOfSolutions):
-        shortest_path_model.setParam(GRB.Param.SolutionNumber, i)
-        values = shortest_path_model.Xn
-        path = []
-        current = start
-        path.append(current)
-        while current != end:
-            for i,j in dist.keys():
-                if values[mapperPairToIndex[i,j]] == 1 and i == current:
-                    path.append(j)
-                    current = j
-                    break
-        paths.append(path)
+        # Building the path, one pass over the arcs of each pool solution
+        paths = []
+        numberOfSolutions = shortest_path_model.SolCount
+        for k in range(numberOfSolutions):
+            shortest_path_model.setParam(GRB.Param.SolutionNumber, k)
+            try:
+                path, cycles = _walk_selected_arcs(start, end, flow.selected_arcs(GRB.Attr.Xn))
+            except Exception as e:
+                print("solution", k, "ignorée :", e)
+                continue
+            for cycle in cycles:
+                print("cycle détaché dans la solution", k, ":", " -> ".join(cycle))
+            if path not in paths:
+                paths.append(path)
+        if not paths:
+            raise Exception("La solution ne relie pas le noeud de depart au noeud d'arrivee")
  
-    return shortest_path_model.objVal, paths
+    return ShortestPathResult(shortest_path_model.objVal, paths, start, end, dist, vertices, selected,
+                              *solveControl.solve_status(shortest_path_model))
+
+
+def _check_pair(start, end, vertices):
+    if start==end:
+        raise Exception("Le noeud de depart est le meme que le noeud d'arrivee")
+    if start not in vertices:
+        raise Exception("Le noeud de départ n'existe pas")
+    if end not in vertices:
+        raise Exception("Le noeud de fin n'existe pas")
+
+
+def shortest_paths_batch(pairs, dist:dict[(str,str),float], workers:int=None):
+    """
+    Shortest paths for many (start, end) pairs of the same graph.
+
+    The flow model is built once and solved as a linear program: the flow
+    conservation matrix is totally unimodular, so the optimal basis is a
+    path, and changing only the start/end right-hand sides lets the dual
+    simplex restart from the previous basis. With ``workers`` > 1 the pairs
+    are split into chunks solved on separate processes.
+
+    Yields ``(pair, cost, paths)`` as the results arrive, with ``cost`` None
+    and no path when the end cannot be reached from the start.
+    """
+    pairs = list(pairs)
+    vertices = _vertices(dist)
+    for start, end in pairs:
+        _check_pair(start, end, vertices)
+    check_negative_cycle(dist)
+
+    if workers is None or workers <= 1 or len(pairs) < 2:
+        yield from _solve_pairs(pairs, dist, vertices)
+        return
+    size = -(-len(pairs) // workers)
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [executor.submit(_solve_pairs_chunk, pairs[i:i + size], dist)
+                   for i in range(0, len(pairs), size)]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+def _solve_pairs_chunk(pairs, dist):
+    vertices = _vertices(dist)
+    return list(_solve_pairs(pairs, dist, vertices))
+
+
+def _solve_pairs(pairs, dist, vertices):
+    flow = FlowModel(dist, vertices, vtype=GRB.CONTINUOUS)
+    # disposed also when the consumer stops early or a pair fails
+    try:
+        flow.model.params.OutputFlag = 0
+        flow.model.params.Method = 1
+        for start, end in pairs:
+            flow.set_endpoints(start, end)
+            flow.model.optimize()
+            if flow.model.status == GRB.INFEASIBLE:
+                yield (start, end), None, []
+                continue
+            flow.check_status()
+            path, _ = _walk_selected_arcs(start, end, flow.selected_arcs())
+            yield (start, end), flow.model.objVal, [path]
+    finally:
+        flow.model.dispose()
     
     
 if __name__ == "__main__":
@@ -0,0 +1,75 @@
+from collections.abc import Sequence
+
+from gurobipy import GRB
+
+
+class PoolOptions:
+    """
+    Size, search mode and relative gap of the Gurobi solution pool.
+
+    ``search_mode`` is Gurobi's PoolSearchMode: 0 keeps the solutions met
+    while looking for the optimum, 1 and 2 search for more, 2 for the
+    ``size`` best ones. ``gap`` None keeps every solution found. The default,
+    one solution in mode 0, spends no effort on the pool.
+    """
+
+    def __init__(self, size: int = 1, search_mode: int = 0, gap: float = None):
+        if size < 1:
+            raise Exception("La taille du pool doit être au moins 1")
+        if search_mode not in (0, 1, 2):
+            raise Exception("Mode de recherche du pool inconnu : " + str(search_mode))
+        if gap is not None and gap < 0:
+            raise Exception("L'écart du pool doit être positif")
+        self.size = size
+        self.search_mode = search_mode
+        self.gap = gap
+
+    def apply(self, model):
+        model.setParam(GRB.Param.PoolSolutions, self.size)
+        model.setParam(GRB.Param.PoolSearchMode, self.search_mode)
+        model.setParam(GRB.Param.PoolGap, GRB.INFINITY if self.gap is None else self.gap)
+
+    def __repr__(self):
+        return "PoolOptions(size=%d, search_mode=%d, gap=%r)" % (self.size, self.search_mode, self.gap)
+
+
+# only the optimal solution
+OPTIMUM = PoolOptions()
+
+
+class SolutionPool(Sequence):
+    """
+    Solutions of the pool of a solved model, best first. Solution ``k`` is
+    built by ``extract(k)`` the first time it is accessed and kept, so a
+    caller reading only ``pool[0]`` pays for one extraction. The model must
+    not be modified or solved again while the pool is read.
+
+    ``status`` and ``gap`` are those of the solve (see
+    solveControl.solve_status), a solve stopped by a limit returns its best
+    solutions with a status other than GRB.OPTIMAL.
+    """
+
+    def __init__(self, count: int, extract, status=GRB.OPTIMAL, gap=None):
+        self.status = status
+        self.gap = gap
+        self._extract = extract
+        self._solutions = [None] * count
+        self._extracted = [False] * count
+
+    def __len__(self):
+        return len(self._solutions)
+
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            return [self[i] for i in range(*k.indices(len(self)))]
+        if k < 0:
+            k += len(self)
+        if not 0 <= k < len(self):
+            raise IndexError("solution " + str(k) + " hors du pool")
+        if not self._extracted[k]:
+            self._solutions[k] = self._extract(k)
+            self._extracted[k] = True
+        return self._solutions[k]
+
+    def __repr__(self):
+        return "SolutionPool(%d solutions, %d extraites)" % (len(self), sum(self._extracted))
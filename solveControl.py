@@ -0,0 +1,196 @@
+import multiprocessing.util
+import os
+import threading
+import time
+
+import gurobipy as gp
+from gurobipy import GRB
+
+
+class SolveCancelled(Exception):
+    def __init__(self):
+        super().__init__("Résolution annulée")
+
+
+# minimum delay in seconds between two progress reports
+PROGRESS_INTERVAL = 0.5
+
+
+class SolveControl:
+    """
+    Shared between the caller and the thread running a solve: the caller can
+    cancel it, the solver reports its progress to ``progress`` (a callable
+    receiving a dict) and uses at most ``threads`` Gurobi threads (0 lets
+    Gurobi decide). ``env`` is the Gurobi environment of the solve, a new one
+    is created on first use when it is None and disposed by close.
+    """
+
+    def __init__(self, threads: int = 0, progress=None, env=None):
+        self.threads = threads
+        self.progress = progress
+        self._cancelled = threading.Event()
+        self._env = env
+        # the environment was created here, close disposes it
+        self._owns_env = False
+        self._reported = 0.0
+        self.model_name = ""
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        # the running model is terminated from its own callback
+        self._cancelled.set()
+
+    @property
+    def env(self):
+        # one environment per solve, Gurobi environments are not shared
+        # between threads
+        if self._env is None:
+            self._env = gp.Env()
+            self._owns_env = True
+        return self._env
+
+    def close(self):
+        """
+        Dispose the environment created by the control, an environment given
+        to the constructor belongs to the caller and is left alone.
+        """
+        if self._owns_env:
+            self._env.dispose()
+            self._env = None
+            self._owns_env = False
+
+    def callback(self, model, where):
+        if self.cancelled:
+            model.terminate()
+            return
+        if self.progress is None or time.monotonic() - self._reported < PROGRESS_INTERVAL:
+            return
+        if where in (GRB.Callback.MIP, GRB.Callback.SIMPLEX):
+            self._reported = time.monotonic()
+        if where == GRB.Callback.MIP:
+            best = model.cbGet(GRB.Callback.MIP_OBJBST)
+            bound = model.cbGet(GRB.Callback.MIP_OBJBND)
+            gap = abs(bound - best) / max(abs(best), 1e-10) if abs(best) < GRB.INFINITY else None
+            self.progress({
+                "model": self.model_name,
+                "runtime": model.cbGet(GRB.Callback.RUNTIME),
+                "best": best,
+                "bound": bound,
+                "gap": gap,
+            })
+        elif where == GRB.Callback.SIMPLEX:
+            self.progress({
+                "model": self.model_name,
+                "runtime": model.cbGet(GRB.Callback.RUNTIME),
+                "best": model.cbGet(GRB.Callback.SPX_OBJVAL),
+            })
+
+
+def env(control: SolveControl = None):
+    """
+    Environment to create the models of a solve with, None for the default one.
+    """
+    return control.env if control is not None else None
+
+
+# statuses of a solve stopped by a limit, its best solution can be used
+LIMITS = {
+    GRB.TIME_LIMIT: "limite de temps atteinte",
+    GRB.NODE_LIMIT: "limite de noeuds atteinte",
+    GRB.ITERATION_LIMIT: "limite d'itérations atteinte",
+    GRB.SOLUTION_LIMIT: "limite de solutions atteinte",
+    GRB.WORK_LIMIT: "limite de travail atteinte",
+    GRB.MEM_LIMIT: "limite de mémoire atteinte",
+}
+
+
+def check_limit(model):
+    """
+    Raise when the solve of ``model`` stopped on a limit before finding any
+    solution. A limit reached with a solution is not an error, see
+    solve_status.
+    """
+    if model.Status in LIMITS and model.SolCount == 0:
+        raise Exception("Aucune solution trouvée : " + LIMITS[model.Status])
+
+
+def solve_status(model):
+    """
+    ``(status, gap)`` of the last solve of ``model``: its Gurobi status and
+    the relative MIP gap of the best solution, None for a linear program or
+    without solution.
+    """
+    gap = model.MIPGap if model.IsMIP and model.SolCount > 0 else None
+    return model.Status, gap
+
+
+def describe(status, gap=None) -> str:
+    """
+    Warning shown with a solution that is not proven optimal, "" for an
+    optimal one.
+    """
+    if status is None or status == GRB.OPTIMAL:
+        return ""
+    text = "Solution non prouvée optimale : " + LIMITS.get(status, "statut " + str(status))
+    # no gap without a bound
+    if gap is not None and gap < GRB.INFINITY:
+        text += ", gap " + str(round(100 * gap, 2)) + "%"
+    return text
+
+
+# (pid, environment) of the current worker process
+_process_env = None
+
+
+def process_env():
+    """
+    Gurobi environment shared by the solves of the current worker process,
+    created on first use and disposed when the process exits.
+    """
+    global _process_env
+    # a forked process does not inherit the environment of its parent
+    if _process_env is None or _process_env[0] != os.getpid():
+        env = gp.Env()
+        multiprocessing.util.Finalize(None, env.dispose, exitpriority=10)
+        _process_env = (os.getpid(), env)
+    return _process_env[1]
+
+
+def optimize(model, control: SolveControl = None, telemetry=None):
+    """
+    ``model.optimize()`` under the control of ``control``: thread limit,
+    progress reports and cancellation through the Gurobi callback, with the
+    solve phase and its progression recorded in ``telemetry``. Raises
+    SolveCancelled when the solve was cancelled.
+    """
+    callbacks = []
+    if control is not None:
+        if control.cancelled:
+            raise SolveCancelled()
+        if control.threads:
+            # a lower cap already set on the model, by a solver profile, is kept
+            current = model.Params.Threads
+            model.Params.Threads = min(control.threads, current) if current else control.threads
+        control.model_name = model.ModelName
+        callbacks.append(control.callback)
+    if telemetry is not None:
+        telemetry.model_size(model)
+        callbacks.append(telemetry.callback)
+
+    def callback(model, where):
+        for function in callbacks:
+            function(model, where)
+
+    if telemetry is not None:
+        with telemetry.phase("solve"):
+            model.optimize(callback)
+        telemetry.finish(model)
+    elif callbacks:
+        model.optimize(callback)
+    else:
+        model.optimize()
+    if control is not None and control.cancelled and model.Status == GRB.INTERRUPTED:
+        raise SolveCancelled()
@@ -0,0 +1,100 @@
+import os
+
+from PyQt5 import QtCore
+
+from solveControl import SolveControl
+
+# Gurobi threads shared by all the solves running at the same time
+THREAD_BUDGET = os.cpu_count() or 1
+# solves allowed to run at the same time
+MAX_CONCURRENT_SOLVES = 2
+
+
+class _WorkerSignals(QtCore.QObject):
+    progress = QtCore.pyqtSignal(object, object)
+    finished = QtCore.pyqtSignal(object, object)
+    failed = QtCore.pyqtSignal(object, object)
+
+
+class SolveWorker(QtCore.QRunnable):
+    """
+    Runs ``function(*args, control=..., **kwargs)`` on a pool thread and
+    reports through Qt signals, so the GUI thread never waits on a solve.
+    """
+
+    def __init__(self, function, args, kwargs, threads, signals):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = signals
+        self.control = SolveControl(threads=threads, progress=lambda info: signals.progress.emit(self, info))
+
+    def run(self):
+        try:
+            result = self.function(*self.args, control=self.control, **self.kwargs)
+        except Exception as e:
+            self.signals.failed.emit(self, e)
+        else:
+            self.signals.finished.emit(self, result)
+        finally:
+            self.control.close()
+
+    def cancel(self):
+        self.control.cancel()
+
+
+class SolveManager(QtCore.QObject):
+    """
+    Runs the solves of the wizards on a thread pool. At most
+    ``max_concurrent`` solves run at the same time, each with an equal share
+    of ``thread_budget`` Gurobi threads. The callbacks are called on the GUI
+    thread.
+    """
+
+    changed = QtCore.pyqtSignal()
+
+    def __init__(self, thread_budget: int = THREAD_BUDGET, max_concurrent: int = MAX_CONCURRENT_SOLVES, parent=None):
+        super().__init__(parent)
+        self.pool = QtCore.QThreadPool(self)
+        self.pool.setMaxThreadCount(max_concurrent)
+        self.threads_per_solve = max(1, thread_budget // max_concurrent)
+        self.signals = _WorkerSignals(self)
+        self.signals.progress.connect(self._on_progress)
+        self.signals.finished.connect(self._on_finished)
+        self.signals.failed.connect(self._on_failed)
+        self.callbacks = {}
+
+    def submit(self, function, *args, on_finished=None, on_failed=None, on_progress=None, **kwargs) -> SolveWorker:
+        worker = SolveWorker(function, args, kwargs, self.threads_per_solve, self.signals)
+        self.callbacks[worker] = (on_finished, on_failed, on_progress)
+        self.pool.start(worker)
+        self.changed.emit()
+        return worker
+
+    def running(self) -> int:
+        return len(self.callbacks)
+
+    def cancel_all(self):
+        for worker in self.callbacks:
+            worker.cancel()
+
+    @QtCore.pyqtSlot(object, object)
+    def _on_progress(self, worker, info):
+        if worker in self.callbacks and self.callbacks[worker][2] is not None:
+            self.callbacks[worker][2](info)
+
+    @QtCore.pyqtSlot(object, object)
+    def _on_finished(self, worker, result):
+        on_finished, _, _ = self.callbacks.pop(worker, (None, None, None))
+        self.changed.emit()
+        if on_finished is not None:
+            on_finished(result)
+
+    @QtCore.pyqtSlot(object, object)
+    def _on_failed(self, worker, error):
+        _, on_failed, _ = self.callbacks.pop(worker, (None, None, None))
+        self.changed.emit()
+        if on_failed is not None:
+            on_failed(error)
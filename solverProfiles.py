@@ -0,0 +1,165 @@
+"""
+Named Gurobi parameter profiles and the tuned parameters of each model family
+("shortest_path", "resource", "cell_tower").
+
+The parameters applied to a model are the tuned ones cached in TUNING_DIR for
+its family, then those of the chosen profile. Tuning is run offline:
+
+    python solverProfiles.py cell_tower instance1.mps instance2.mps
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+
+import gurobipy as gp
+from gurobipy import GRB
+
+PROFILES = {
+    # quick answers in the user interface, a small gap is acceptable and a
+    # few threads leave the machine responsive
+    "interactive": {"TimeLimit": 10, "MIPGap": 0.01, "Presolve": 1, "Threads": 4},
+    # unattended runs, more time and the default accuracy, deterministic
+    # concurrent LP so that two runs give the same result
+    "batch": {"TimeLimit": 600, "MIPGap": 1e-4, "Presolve": 2, "Method": 4},
+    # proven optimum, no time limit
+    "exact": {"MIPGap": 0, "MIPGapAbs": 0},
+}
+# profile of the solves that do not choose one, None for the Gurobi defaults
+DEFAULT_PROFILE = None
+
+# directory of the tuned parameters, one <family>.json file per model family
+TUNING_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tuning")
+
+_tuned = {}
+_lock = threading.Lock()
+
+
+def tuned_parameters(family: str) -> dict:
+    """
+    Parameters cached by ``tune`` for ``family``, read again when the file
+    changes, empty when the family was never tuned.
+    """
+    path = os.path.join(TUNING_DIR, family + ".json")
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+    with _lock:
+        cached = _tuned.get(family)
+        if cached is None or cached[0] != mtime:
+            with open(path) as f:
+                cached = (mtime, json.load(f)["parameters"])
+            _tuned[family] = cached
+        return dict(cached[1])
+
+
+def parameters(family: str, profile: str = None) -> dict:
+    if profile is None:
+        profile = DEFAULT_PROFILE
+    if profile is not None and profile not in PROFILES:
+        raise Exception("Profil inconnu : " + str(profile))
+    params = tuned_parameters(family)
+    if profile is not None:
+        params.update(PROFILES[profile])
+    return params
+
+
+def apply(model, family: str, profile: str = None) -> dict:
+    """
+    Set the parameters of ``family`` and ``profile`` on ``model``. The other
+    parameters managed by the profiles go back to their default, so a model
+    reused between solves does not keep the profile of the previous one.
+    Returns the parameters set.
+    """
+    params = parameters(family, profile)
+    managed = set(params)
+    for profile_params in PROFILES.values():
+        managed.update(profile_params)
+    for name in managed - set(params):
+        _, _, current, _, _, default = model.getParamInfo(name)
+        if current != default:
+            model.setParam(name, default)
+    for name, value in params.items():
+        model.setParam(name, value)
+    return params
+
+
+def _changed_parameters(model) -> dict:
+    # Gurobi writes the parameters that differ from their default
+    fd, path = tempfile.mkstemp(suffix=".prm")
+    os.close(fd)
+    try:
+        model.write(path)
+        params = {}
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                name, value = line.split()[:2]
+                params[name] = json.loads(value) if _is_number(value) else value
+        return params
+    finally:
+        os.remove(path)
+
+
+def _is_number(value: str) -> bool:
+    try:
+        float(value)
+        return True
+    except ValueError:
+        return False
+
+
+def _runtime(model, params, time_limit):
+    model.resetParams()
+    model.setParam(GRB.Param.OutputFlag, 0)
+    for name, value in params.items():
+        model.setParam(name, value)
+    model.setParam(GRB.Param.TimeLimit, time_limit)
+    model.reset()
+    model.optimize()
+    return model.Runtime
+
+
+def tune(family: str, models, tune_time: float = 60, time_limit: float = 60) -> dict:
+    """
+    Run Gurobi's tuning tool on each representative model, keep the candidate
+    parameter set with the smallest total runtime over all of them and cache
+    it for ``family``. Returns the parameters kept.
+    """
+    models = list(models)
+    if not models:
+        raise Exception("Aucune instance à régler")
+    candidates = [{}]
+    for model in models:
+        model.resetParams()
+        model.setParam(GRB.Param.TuneTimeLimit, tune_time)
+        model.setParam(GRB.Param.TuneOutput, 0)
+        model.tune()
+        if model.TuneResultCount > 0:
+            model.getTuneResult(0)
+            params = _changed_parameters(model)
+            for name in ("TuneTimeLimit", "TuneOutput"):
+                params.pop(name, None)
+            if params not in candidates:
+                candidates.append(params)
+
+    runtimes = [sum(_runtime(model, params, time_limit) for model in models) for params in candidates]
+    best = min(range(len(candidates)), key=runtimes.__getitem__)
+
+    os.makedirs(TUNING_DIR, exist_ok=True)
+    with open(os.path.join(TUNING_DIR, family + ".json"), "w") as f:
+        json.dump({"family": family, "parameters": candidates[best], "runtime": runtimes[best],
+                   "default_runtime": runtimes[0], "instances": len(models)}, f, indent=2)
+    return candidates[best]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("usage : python solverProfiles.py <famille> <modèle.mps|.lp> ...")
+        sys.exit(1)
+    best = tune(sys.argv[1], [gp.read(path) for path in sys.argv[2:]])
+    print("paramètres retenus pour", sys.argv[1], ":", best)
@@ -0,0 +1,116 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+from gurobipy import GRB
+
+# JSON lines file receiving every record, None to keep them in memory only
+LOG_PATH = None
+
+_listeners = []
+_lock = threading.Lock()
+
+
+def add_listener(listener):
+    """
+    Call ``listener(record)`` for every emitted record. The listener runs on
+    the thread of the solve.
+    """
+    with _lock:
+        _listeners.append(listener)
+
+
+def remove_listener(listener):
+    with _lock:
+        _listeners.remove(listener)
+
+
+class SolveTelemetry:
+    """
+    Timing and size record of one solve: build, presolve, solve and
+    extraction times, model size and the incumbent/bound progression.
+    """
+
+    def __init__(self, family: str):
+        self.record = {
+            "family": family,
+            "started": time.time(),
+            "phases": {},
+            "model": {},
+            "progress": [],
+        }
+        self._in_presolve = False
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            phases = self.record["phases"]
+            phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+
+    def set(self, key: str, value):
+        self.record[key] = value
+
+    def model_size(self, model):
+        model.update()
+        self.record["model"] = {
+            "vars": model.NumVars,
+            "int_vars": model.NumIntVars,
+            "constrs": model.NumConstrs,
+            "nonzeros": model.NumNZs,
+        }
+
+    def callback(self, model, where):
+        if where == GRB.Callback.PRESOLVE:
+            self._in_presolve = True
+        elif self._in_presolve and where != GRB.Callback.POLLING:
+            self._in_presolve = False
+            self.record["phases"]["presolve"] = model.cbGet(GRB.Callback.RUNTIME)
+        if where == GRB.Callback.MIP:
+            best = model.cbGet(GRB.Callback.MIP_OBJBST)
+            bound = model.cbGet(GRB.Callback.MIP_OBJBND)
+            progress = self.record["progress"]
+            if not progress or progress[-1][1:] != [best, bound]:
+                progress.append([model.cbGet(GRB.Callback.RUNTIME), best, bound])
+
+    def finish(self, model):
+        self.record["status"] = model.Status
+        self.record["runtime"] = model.Runtime
+        self.record["solutions"] = model.SolCount
+        if model.SolCount > 0:
+            self.record["objective"] = model.ObjVal
+        if model.IsMIP and model.SolCount > 0:
+            self.record["mip_gap"] = model.MIPGap
+            self.record["bound"] = model.ObjBound
+
+    def to_json(self) -> str:
+        return json.dumps(self.record, default=str)
+
+    def emit(self):
+        line = self.to_json()
+        with _lock:
+            listeners = list(_listeners)
+            if LOG_PATH is not None:
+                with open(LOG_PATH, "a") as f:
+                    f.write(line + "\n")
+        for listener in listeners:
+            listener(json.loads(line))
+
+
+@contextmanager
+def recording(family: str):
+    """
+    ``with recording("family") as telemetry:`` emits the record when the block
+    ends, with the error message if it raised.
+    """
+    telemetry = SolveTelemetry(family)
+    try:
+        yield telemetry
+    except Exception as e:
+        telemetry.set("error", str(e))
+        raise
+    finally:
+        telemetry.emit()
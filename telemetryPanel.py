@@ -0,0 +1,48 @@
+import json
+
+from PyQt5 import QtCore, QtWidgets
+
+import solverTelemetry
+
+
+class TelemetryPanel(QtWidgets.QDockWidget):
+    """
+    Collapsible panel listing the telemetry record of every solve, a summary
+    line followed by the JSON record.
+    """
+
+    recorded = QtCore.pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__("Télémétrie", parent)
+        self.setObjectName("telemetryPanel")
+        self.text = QtWidgets.QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.setWidget(self.text)
+        # records arrive on the solve threads, the signal brings them back to
+        # the GUI thread
+        self.recorded.connect(self.add_record)
+        solverTelemetry.add_listener(self.recorded.emit)
+
+    @QtCore.pyqtSlot(object)
+    def add_record(self, record):
+        self.text.appendPlainText(summary(record))
+        self.text.appendPlainText(json.dumps(record))
+        self.text.appendPlainText("")
+
+
+def summary(record) -> str:
+    phases = ", ".join(name + " " + str(round(seconds, 4)) + "s" for name, seconds in record["phases"].items())
+    line = record["family"]
+    if "backend" in record:
+        line += " (" + record["backend"] + ")"
+    line += " : " + phases
+    model = record.get("model")
+    if model:
+        line += " | " + str(model["vars"]) + " vars, " + str(model["constrs"]) + " contraintes, " \
+                + str(model["nonzeros"]) + " non-zeros"
+    if "mip_gap" in record:
+        line += " | gap " + str(round(100 * record["mip_gap"], 4)) + "%"
+    if "error" in record:
+        line += " | erreur : " + record["error"]
+    return line
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("gurobipy")
+
+from CellTowerCoverageModule import CoverageData
+
+# sites keyed by name, not by position
+SITES = {"north": [{0, 1}, 4.0], "south": [{2}, 3.0], "east": [{1, 2}, 5.0]}
+POPULATION = {0: 100, 1: 200, 2: 50}
+
+
+def test_metrics_site_keys():
+    data = CoverageData(POPULATION, SITES)
+    metrics = data.metrics(np.array([1.0, 0.0, 1.0]), 10)
+    assert metrics["towers_built"] == ["north", "east"]
+    assert metrics["total_cost"] == 9.0
+    assert metrics["coverage_percentage"] == 100.0
+
+
+def _instance(seed, regions=8, sites=7):
+    rng = np.random.default_rng(seed)
+    population = {i: int(rng.integers(1, 1000)) for i in range(regions)}
+    coverage = {j: [set(np.flatnonzero(rng.random(regions) < 0.35).tolist()), float(rng.integers(1, 10))]
+                for j in range(sites)}
+    return CoverageData(population, coverage), float(rng.integers(5, 20))
+
+
+def _optimum(data, budget):
+    # every affordable non-empty set of sites
+    best = 0.0
+    for mask in range(1, 2 ** len(data.sites)):
+        built = np.array([(mask >> j) & 1 for j in range(len(data.sites))], dtype=float)
+        if data.cost_array @ built <= budget:
+            best = max(best, float(data.population_array @ ((data.covering @ built) > 0)))
+    return best
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_greedy_bounds(seed):
+    data, budget = _instance(seed)
+    built, report = data.greedy(budget)
+    optimum = _optimum(data, budget)
+    value = report["covered_population"]
+    assert data.cost_array @ built <= budget
+    assert value == data.population_array @ ((data.covering @ built) > 0)
+    assert value >= report["guarantee"] * optimum - 1e-9
+    assert value <= optimum + 1e-9 <= report["upper_bound"] + 2e-9
+    # the bound from scratch, before any site is built
+    assert optimum <= data._upper_bound(0.0, np.ones(len(data.regions), dtype=bool), budget) + 1e-9
+
+
+def test_greedy_nothing_affordable():
+    data = CoverageData(POPULATION, SITES)
+    assert data.greedy(2.0) is None
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from coverageGeometry import coverage_matrix, polygon_centroids, site_coverage_cost
+
+
+def _brute_force(site_xy, radius, region_xy):
+    distance = np.linalg.norm(region_xy[:, None, :] - site_xy[None, :, :], axis=2)
+    return (distance <= np.broadcast_to(radius, (len(site_xy),))).astype(float)
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("per_site", [False, True])
+def test_coverage_matrix_brute_force(seed, per_site):
+    rng = np.random.default_rng(seed)
+    site_xy = rng.random((15, 2)) * 10
+    region_xy = rng.random((40, 2)) * 10
+    radius = rng.random(15) * 4 if per_site else 2.5
+    covering = coverage_matrix(site_xy, radius, region_xy)
+    assert covering.shape == (40, 15)
+    assert covering.nnz == covering.count_nonzero()
+    assert (covering.toarray() == _brute_force(site_xy, radius, region_xy)).all()
+
+
+def test_coverage_matrix_no_region_covered():
+    covering = coverage_matrix([[0, 0]], 1, [[5, 5], [-3, 0]])
+    assert covering.shape == (2, 1)
+    assert covering.nnz == 0
+
+
+def test_negative_radius():
+    with pytest.raises(Exception, match="rayon"):
+        coverage_matrix([[0, 0], [1, 1]], [1, -1], [[0, 0]])
+
+
+def test_site_coverage_cost():
+    covering = coverage_matrix([[0, 0], [10, 0]], 1.5, [[0, 1], [1, 0], [10, 1]])
+    assert site_coverage_cost(covering, [2, 3]) == {0: [{0, 1}, 2.0], 1: [{2}, 3.0]}
+
+
+def test_polygon_centroids():
+    square = [(0, 0), (2, 0), (2, 2), (0, 2)]
+    triangle = [(0, 0), (3, 0), (0, 3)]
+    segment = [(0, 0), (2, 2)]
+    assert np.allclose(polygon_centroids([square, triangle, segment]), [(1, 1), (1, 1), (1, 1)])
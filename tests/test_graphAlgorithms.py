@@ -0,0 +1,89 @@
+import pytest
+
+import graphAlgorithms
+from graphAlgorithms import bellman_ford, build_adjacency, dijkstra, find_negative_cycle, yen_k_shortest_paths
+
+# two tied routes through B and C, a 0-cost arc between them and a direct arc
+TIED = {
+    ("A", "B"): 1, ("A", "C"): 1,
+    ("B", "D"): 1, ("C", "D"): 1,
+    ("B", "C"): 0, ("C", "B"): 0,
+    ("A", "D"): 3,
+}
+
+# the example of shortestPathModel, C -> D -> E -> C costs -3
+NEGATIVE = {
+    ("A", "B"): 5,
+    ("B", "C"): 2,
+    ("C", "D"): -1,
+    ("D", "E"): -1,
+    ("E", "C"): -1,
+    ("C", "F"): 5,
+}
+
+
+def _names(adj, path):
+    return [adj.nodes[v] for v in path]
+
+
+@pytest.mark.parametrize("search", [dijkstra, bellman_ford])
+def test_single_pair(search):
+    adj = build_adjacency(TIED)
+    cost, path = search(adj, adj.index["A"], adj.index["D"])
+    assert cost == 2
+    assert _names(adj, path) in (["A", "B", "D"], ["A", "C", "D"])
+
+
+def test_unreachable():
+    adj = build_adjacency({("A", "B"): 1, ("C", "D"): 1})
+    assert dijkstra(adj, adj.index["A"], adj.index["D"]) == (graphAlgorithms.INF, None)
+    assert yen_k_shortest_paths(adj, adj.index["A"], adj.index["D"], 3) == []
+
+
+@pytest.mark.parametrize("search", [dijkstra, bellman_ford])
+def test_yen_tied_costs(search):
+    adj = build_adjacency(TIED)
+    found = yen_k_shortest_paths(adj, adj.index["A"], adj.index["D"], 10, search)
+
+    costs = [cost for cost, _ in found]
+    paths = [tuple(_names(adj, path)) for _, path in found]
+    assert costs == [2, 2, 2, 2, 3]
+    assert set(paths) == {("A", "B", "D"), ("A", "C", "D"), ("A", "B", "C", "D"), ("A", "C", "B", "D"), ("A", "D")}
+    # loopless and each reported cost is the cost of its path
+    for cost, path in found:
+        assert len(set(path)) == len(path)
+        assert adj.path_cost(path) == cost
+
+
+def test_yen_stops_at_k():
+    adj = build_adjacency(TIED)
+    assert len(yen_k_shortest_paths(adj, adj.index["A"], adj.index["D"], 2)) == 2
+
+
+@pytest.mark.parametrize("search", [dijkstra, bellman_ford])
+def test_yen_parallel_arcs(search):
+    # the cheap A -> B arc is the one every path uses
+    adj = graphAlgorithms.Adjacency(["A", "B", "C", "D"], [0, 0, 1, 1, 3], [1, 1, 2, 3, 2], [5, 1, 3, 1, 1])
+    assert adj.weight(0, 1) == 1
+    found = yen_k_shortest_paths(adj, 0, 2, 5, search)
+    assert [(cost, _names(adj, path)) for cost, path in found] == [(3, ["A", "B", "D", "C"]), (4, ["A", "B", "C"])]
+
+
+def test_negative_cycle_of_the_example():
+    cycle = find_negative_cycle(build_adjacency(NEGATIVE))
+    assert cycle[0] == cycle[-1]
+    assert len(cycle) == 4
+    # the same cycle, whichever vertex it starts from
+    start = cycle.index("C")
+    assert cycle[start:-1] + cycle[:start] == ["C", "D", "E"]
+
+
+def test_no_negative_cycle():
+    assert find_negative_cycle(build_adjacency({("A", "B"): -1, ("B", "C"): -1, ("C", "A"): 2})) is None
+
+
+def test_bellman_ford_raises_on_negative_cycle():
+    adj = build_adjacency(NEGATIVE)
+    with pytest.raises(graphAlgorithms.NegativeCycleError) as error:
+        bellman_ford(adj, adj.index["A"], adj.index["F"])
+    assert set(error.value.cycle) == {"C", "D", "E"}
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+import graphLoader
+from graphLoader import EdgeList, load_csv, load_npy, load_rows
+
+ROWS = [["A", "B", "1"], [" B", "C ", "2.5"], [], ["A", "C", "4"]]
+
+
+def test_rows_intern_nodes():
+    edges = load_rows(ROWS)
+    assert edges.nodes == ["A", "B", "C"]
+    assert edges.tails.tolist() == [0, 1, 0]
+    assert edges.heads.tolist() == [1, 2, 2]
+    assert edges.weights.tolist() == [1.0, 2.5, 4.0]
+    assert dict(edges.items()) == {("A", "B"): 1.0, ("B", "C"): 2.5, ("A", "C"): 4.0}
+
+
+def test_from_dict_matches_rows():
+    edges = EdgeList.from_dict({("A", "B"): 1, ("B", "C"): 2.5, ("A", "C"): 4})
+    assert dict(edges.items()) == dict(load_rows(ROWS).items())
+
+
+@pytest.mark.parametrize("rows, message", [
+    ([["A", "B"]], "Ligne 1 : 3 colonnes"),
+    ([["A", "B", "1"], ["B", "C", "x"]], "Ligne 2 : le poids"),
+    ([["A", "B", "1"], ["B", "C", "2"], [], ["A", "B", "3"]], "Ligne 4 : arc déjà donné ligne 1"),
+])
+def test_rows_errors(rows, message):
+    with pytest.raises(Exception, match=message):
+        load_rows(rows)
+
+
+def test_csv_header_line_numbers(tmp_path):
+    path = tmp_path / "edges.csv"
+    path.write_text("source,target,weight\nA,B,1\nB,C,2\nA,B,5\n")
+    with pytest.raises(Exception, match="Ligne 4 : arc déjà donné ligne 2"):
+        load_csv(str(path), header=True)
+    path.write_text("source\ttarget\tweight\nA\tB\t1\nB\tC\t2\n")
+    assert dict(graphLoader.load_tsv(str(path), header=True).items()) == {("A", "B"): 1.0, ("B", "C"): 2.0}
+
+
+def test_npy(tmp_path):
+    path = tmp_path / "edges.npy"
+    np.save(path, np.array([[0, 1, 1.5], [1, 2, 2.0]]))
+    edges = load_npy(str(path))
+    assert edges.nodes == [0, 1, 2]
+    assert dict(edges.items()) == {(0, 1): 1.5, (1, 2): 2.0}
+    assert dict(load_npy(str(path), nodes=["A", "B", "C"], mmap=False).items()) == {("A", "B"): 1.5, ("B", "C"): 2.0}
+    with pytest.raises(Exception, match="depasse"):
+        load_npy(str(path), nodes=["A", "B"])
+
+
+@pytest.mark.parametrize("data, message", [
+    (np.zeros((2, 2)), "forme"),
+    (np.array([[0, 1, 1.0], [1, 2, 1.0], [0, 1, 3.0]]), "lignes 0 et 2"),
+])
+def test_npy_errors(tmp_path, data, message):
+    path = tmp_path / "edges.npy"
+    np.save(path, data)
+    with pytest.raises(Exception, match=message):
+        load_npy(str(path))
@@ -0,0 +1,60 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("gurobipy")
+
+from planArchive import INDEX, PlanArchive, PlanWriter
+from RessourceModule import PlanPool
+
+PERIODS = ["p1", "p2", "p3"]
+TASKS = ["t1", "t2"]
+
+
+def _pool(count, seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.random((count, 3, len(PERIODS), len(TASKS))).astype(np.float32)
+    return PlanPool(values, -np.arange(count, dtype=float), PERIODS, TASKS)
+
+
+def _same_solution(a, b):
+    assert a["objective_value"] == b["objective_value"]
+    for plan in ("tasks_plan", "make_plan", "inventory_plan"):
+        assert a[plan].equals(b[plan])
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 100])
+def test_round_trip(tmp_path, chunk_size):
+    plans = _pool(7)
+    with PlanWriter(tmp_path, PERIODS, TASKS, chunk_size) as sink:
+        sink.write_pool(plans)
+    archive = PlanArchive(tmp_path)
+    assert len(archive) == 7
+    assert archive.periods == PERIODS and archive.tasks == TASKS
+    assert archive.status is None
+    # backwards, every read after the first loads another chunk
+    for i in reversed(range(7)):
+        _same_solution(plans[i], archive[i])
+        assert np.array_equal(archive._values(i), plans.values[i])
+    assert len(archive.chunks) == -(-7 // chunk_size)
+
+
+def test_interrupted_writer(tmp_path):
+    # without close, only the full chunks are written
+    sink = PlanWriter(tmp_path, PERIODS, TASKS, chunk_size=2)
+    plans = _pool(5)
+    sink.write_pool(plans)
+    archive = PlanArchive(tmp_path)
+    assert len(archive) == 4
+    _same_solution(plans[3], archive[3])
+    sink.close()
+    assert len(PlanArchive(tmp_path)) == 5
+    with open(os.path.join(tmp_path, INDEX)) as f:
+        assert [chunk["count"] for chunk in json.load(f)["chunks"]] == [2, 2, 1]
+
+
+def test_chunk_size():
+    with pytest.raises(Exception, match="taille des blocs"):
+        PlanWriter("unused", PERIODS, TASKS, chunk_size=0)
@@ -0,0 +1,30 @@
+import copy
+import pickle
+
+import pytest
+
+pytest.importorskip("gurobipy")
+
+from shortestPathModel import shortest_path
+
+DIST = {("A", "B"): 1, ("B", "C"): 2, ("A", "C"): 5}
+
+
+def _same(a, b):
+    assert tuple(b) == tuple(a)
+    assert (b.start, b.end, b.dist, b.vertices, b.selected, b.status, b.gap) == \
+        (a.start, a.end, a.dist, a.vertices, a.selected, a.status, a.gap)
+
+
+def test_pickle_round_trip():
+    result = shortest_path("A", "C", DIST, backend="dijkstra")
+    restored = pickle.loads(pickle.dumps(result))
+    assert type(restored) is type(result)
+    _same(result, restored)
+    assert restored.render_key() == result.render_key()
+
+
+def test_copy():
+    result = shortest_path("A", "C", DIST, backend="dijkstra")
+    _same(result, copy.copy(result))
+    _same(result, copy.deepcopy(result))
@@ -0,0 +1,31 @@
+import pytest
+
+pytest.importorskip("gurobipy")
+
+from shortestPathModel import _walk_selected_arcs
+
+
+def test_simple_path():
+    path, cycles = _walk_selected_arcs("A", "C", [("A", "B"), ("B", "C")])
+    assert path == ["A", "B", "C"]
+    assert cycles == []
+
+
+def test_loop_on_the_path_is_cut():
+    # B -> C is followed first and comes back to B
+    path, cycles = _walk_selected_arcs("A", "D", [("A", "B"), ("B", "D"), ("B", "C"), ("C", "B")])
+    assert path == ["A", "B", "D"]
+    assert cycles == [["B", "C", "B"]]
+
+
+def test_detached_cycle():
+    path, cycles = _walk_selected_arcs("A", "B", [("A", "B"), ("X", "Y"), ("Y", "X")])
+    assert path == ["A", "B"]
+    assert len(cycles) == 1
+    assert cycles[0][0] == cycles[0][-1]
+    assert set(cycles[0]) == {"X", "Y"}
+
+
+def test_end_not_reached():
+    with pytest.raises(Exception):
+        _walk_selected_arcs("A", "D", [("A", "B"), ("B", "C"), ("C", "A")])